@@ -0,0 +1,170 @@
+"""
+Box score parser benchmark.
+
+Runs parse_hockey_reference_url over the saved pages in benchmarks/fixtures
+with the fetch stubbed out, once per parser module, and reports pages/sec,
+time per extractor and memory. Each parser runs in a fresh subprocess that
+first imports every compared module, so both pay for the same imports
+(pandas included) and the memory figure is what parsing adds on top.
+
+    cd backend
+    python -m benchmarks.parser_benchmark
+    python -m benchmarks.parser_benchmark --rounds 50 --modules services.hockey_parser
+"""
+import argparse
+import importlib
+import json
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+BOX_SCORE_BASE_URL = "https://www.hockey-reference.com/boxscores/"
+
+PARSER_MODULES = ("services.hockey_parser", "services.hockey_parser_simple")
+
+# Stages timed in the per-extractor breakdown. Times are inclusive: the
+# ParsedPage properties run extract_home_team etc. on first access.
+TIMED_FUNCTIONS = (
+    "load_page",
+    "extract_home_team",
+    "extract_away_team",
+    "extract_home_score",
+    "extract_away_score",
+    "extract_date_from_url",
+    "extract_player_lines",
+    "extract_team_lines",
+    "extract_goalie_lines",
+    "extract_advanced_stats",
+)
+
+
+def load_corpus() -> Dict[str, bytes]:
+    """Fixture pages keyed by the box score URL they were saved from"""
+    return {
+        f"{BOX_SCORE_BASE_URL}{path.name}": path.read_bytes()
+        for path in sorted(FIXTURES_DIR.glob("*.html"))
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_module(module_name: str, rounds: int, imported=PARSER_MODULES) -> Dict[str, Any]:
+    """Benchmark one parser module in this process, after importing all of imported"""
+    for name in imported:
+        importlib.import_module(name)
+    parser = importlib.import_module(module_name)
+    corpus = load_corpus()
+    import_rss_mb = peak_rss_mb()
+
+    # Stub the network: every URL is served from the fixture corpus
+    parser.fetch_box_score_html = corpus.__getitem__
+
+    # Warm up imports, the strainer and the skater layout cache
+    outputs = {url: parser.parse_hockey_reference_url(url) for url in corpus}
+
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url in corpus:
+            parser.parse_hockey_reference_url(url)
+            pages += 1
+    elapsed = time.perf_counter() - start
+
+    # Second pass with every stage wrapped in a timer, kept separate so the
+    # wrappers don't skew the throughput number
+    stage_seconds = defaultdict(float)
+
+    def timed(name, fn):
+        def wrapper(*args, **kwargs):
+            stage_start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stage_seconds[name] += time.perf_counter() - stage_start
+        return wrapper
+
+    for name in TIMED_FUNCTIONS:
+        setattr(parser, name, timed(name, getattr(parser, name)))
+
+    for _ in range(rounds):
+        for url in corpus:
+            parser.parse_hockey_reference_url(url)
+
+    return {
+        "module": module_name,
+        "engine": parser.PARSER_ENGINE,
+        "scoped": parser.SCOPED_PARSE,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "ms_per_page": {name: stage_seconds[name] * 1000 / pages for name in TIMED_FUNCTIONS},
+        "import_rss_mb": import_rss_mb,
+        "peak_rss_mb": peak_rss_mb(),
+        "parse_rss_mb": peak_rss_mb() - import_rss_mb,
+        "outputs": outputs,
+    }
+
+
+def run_in_subprocess(module_name: str, rounds: int, modules) -> Dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.parser_benchmark", "--child", module_name, "--rounds", str(rounds),
+         "--modules", *modules],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # The parsers print diagnostics; the result is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_report(results):
+    print(f"{len(load_corpus())} fixture pages, engine {results[0]['engine']}, scoped parse {results[0]['scoped']}")
+    print()
+    print(f"{'module':<32}{'pages/s':>10}{'ms/page':>10}{'import RSS MB':>16}{'parse RSS MB':>15}")
+    for result in results:
+        print(f"{result['module']:<32}{result['pages_per_second']:>10.1f}"
+              f"{1000 / result['pages_per_second']:>10.2f}{result['import_rss_mb']:>16.1f}{result['parse_rss_mb']:>15.1f}")
+
+    print()
+    print("ms per page by stage (inclusive)")
+    print(f"{'stage':<26}" + "".join(f"{result['module'].split('.')[-1]:>24}" for result in results))
+    for name in TIMED_FUNCTIONS:
+        print(f"{name:<26}" + "".join(f"{result['ms_per_page'][name]:>24.3f}" for result in results))
+
+    # Both parsers must produce the same output for the comparison to mean anything
+    baseline = results[0]
+    for result in results[1:]:
+        for url, output in baseline["outputs"].items():
+            if result["outputs"].get(url) != output:
+                print(f"\nWARNING: {result['module']} output differs from {baseline['module']} for {url}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the box score parsers")
+    arg_parser.add_argument("--rounds", type=int, default=20, help="passes over the fixture corpus")
+    arg_parser.add_argument("--modules", nargs="+", default=list(PARSER_MODULES))
+    arg_parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(benchmark_module(args.child, args.rounds, args.modules)))
+        sys.exit(0)
+
+    results = [run_in_subprocess(module_name, args.rounds, args.modules) for module_name in args.modules]
+    if args.json:
+        for result in results:
+            result.pop("outputs")
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
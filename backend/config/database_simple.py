@@ -19,6 +19,11 @@ class SimpleSupabaseClient:
     
     def table(self, table_name: str):
         return SimpleTable(self.url, self.headers, table_name)
+    
+    def rpc(self, function_name: str, params: Dict[str, Any]):
+        response = requests.post(f"{self.url}/rest/v1/rpc/{function_name}", headers=self.headers, json=params)
+        response.raise_for_status()
+        return SimpleResponse(response.json())
 
 class SimpleTable:
     def __init__(self, base_url: str, headers: Dict, table_name: str):
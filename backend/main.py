@@ -7,6 +7,7 @@ import os
 from pathlib import Path
 
 from routers import auth, games, stats
+from services.task_queue import task_queue
 
 load_dotenv()
 
@@ -42,6 +43,13 @@ app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(games.router, prefix="/games", tags=["games"])
 app.include_router(stats.router, prefix="/stats", tags=["statistics"])
 
+@app.on_event("startup")
+async def run_ingestion_tasks():
+    # Resume tasks cut off by the last restart and run any left queued,
+    # unless worker processes (python -m services.worker) run them
+    if task_queue.runs_jobs:
+        task_queue.start(task_queue.serve())
+
 # Create static directory if it doesn't exist
 static_dir = Path(__file__).parent / "static"
 static_dir.mkdir(exist_ok=True)
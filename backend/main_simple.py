@@ -8,6 +8,7 @@ from pathlib import Path
 
 from routers import auth_simple
 from routers import games_simple, stats_simple
+from services.task_queue_simple import task_queue
 
 load_dotenv()
 
@@ -44,6 +45,13 @@ app.include_router(auth_simple.router, prefix="/auth", tags=["authentication"])
 app.include_router(games_simple.router, prefix="/games", tags=["games"])
 app.include_router(stats_simple.router, prefix="/stats", tags=["statistics"])
 
+@app.on_event("startup")
+async def run_ingestion_tasks():
+    # Resume tasks cut off by the last restart and run any left queued,
+    # unless worker processes (python -m services.worker) run them
+    if task_queue.runs_jobs:
+        task_queue.start(task_queue.serve())
+
 # Create static directory if it doesn't exist
 static_dir = Path(__file__).parent / "static"
 static_dir.mkdir(exist_ok=True)
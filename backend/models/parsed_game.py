@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+# Column order of the player_stats / team_stats rows the parser produces
+PLAYER_LINE_FIELDS = (
+    "player_name", "team", "position", "goals", "assists", "points",
+    "plus_minus", "pim", "shots", "hits", "blocks", "takeaways",
+    "giveaways", "faceoff_wins", "faceoff_losses", "toi_seconds",
+    "shot_attempts", "corsi_for", "corsi_against",
+    "offensive_zone_starts", "defensive_zone_starts",
+)
+TEAM_LINE_FIELDS = (
+    "team_name", "is_home", "goals", "goals_against", "wins", "losses",
+    "ties", "overtime_losses", "shootout_losses",
+)
+GOALIE_LINE_FIELDS = (
+    "player_name", "team", "decision", "goals_against", "shots_against",
+    "saves", "shutouts", "pim", "toi_seconds",
+)
+
+
+@dataclass(slots=True)
+class PlayerLine:
+    """One skater's line from a box score"""
+    player_name: str
+    team: str
+    position: str
+    goals: int = 0
+    assists: int = 0
+    points: int = 0
+    plus_minus: int = 0
+    pim: int = 0
+    shots: int = 0
+    hits: int = 0
+    blocks: int = 0
+    takeaways: int = 0
+    giveaways: int = 0
+    faceoff_wins: int = 0
+    faceoff_losses: int = 0
+    toi_seconds: int = 0
+    # From the advanced (Corsi) table; None when the page has none
+    shot_attempts: Optional[int] = None
+    corsi_for: Optional[int] = None
+    corsi_against: Optional[int] = None
+    offensive_zone_starts: Optional[int] = None
+    defensive_zone_starts: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PLAYER_LINE_FIELDS}
+
+    def to_row(self, game_key: str) -> Dict[str, Any]:
+        """player_stats insert payload"""
+        row = self.to_dict()
+        row["game_key"] = game_key
+        return row
+
+
+@dataclass(slots=True)
+class TeamLine:
+    """One team's result line from a box score"""
+    team_name: str
+    is_home: bool
+    goals: int = 0
+    goals_against: int = 0
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+    overtime_losses: int = 0
+    shootout_losses: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in TEAM_LINE_FIELDS}
+
+    def to_row(self, game_key: str) -> Dict[str, Any]:
+        """team_stats insert payload"""
+        row = self.to_dict()
+        row["game_key"] = game_key
+        return row
+
+
+@dataclass(slots=True)
+class GoalieLine:
+    """One goalie's line from a box score"""
+    player_name: str
+    team: str
+    decision: Optional[str] = None
+    goals_against: int = 0
+    shots_against: int = 0
+    saves: int = 0
+    shutouts: int = 0
+    pim: int = 0
+    toi_seconds: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in GOALIE_LINE_FIELDS}
+
+    def to_row(self, game_key: str) -> Dict[str, Any]:
+        """goalie_stats insert payload"""
+        row = self.to_dict()
+        row["game_key"] = game_key
+        return row
+
+
+@dataclass(slots=True)
+class ParsedGame:
+    """Everything the parser extracts from one box score page"""
+    home_team: str
+    away_team: str
+    final_score_home: int
+    final_score_away: int
+    game_date: Optional[str]
+    player_lines: List[PlayerLine] = field(default_factory=list)
+    team_lines: List[TeamLine] = field(default_factory=list)
+    goalie_lines: List[GoalieLine] = field(default_factory=list)
+    parser_version: Optional[int] = None
+
+    @property
+    def matchup(self) -> str:
+        return f"{self.away_team} @ {self.home_team}"
+
+    def game_fields(self) -> Dict[str, Any]:
+        """Parsed columns of the games row"""
+        return {
+            "home_team": self.home_team,
+            "away_team": self.away_team,
+            "final_score_home": self.final_score_home,
+            "final_score_away": self.final_score_away,
+            "parser_version": self.parser_version,
+        }
+
+    def player_rows(self, game_key: str) -> List[Dict[str, Any]]:
+        return [line.to_row(game_key) for line in self.player_lines]
+
+    def team_rows(self, game_key: str) -> List[Dict[str, Any]]:
+        return [line.to_row(game_key) for line in self.team_lines]
+
+    def goalie_rows(self, game_key: str) -> List[Dict[str, Any]]:
+        return [line.to_row(game_key) for line in self.goalie_lines]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The parser's dict output"""
+        return {
+            "home_team": self.home_team,
+            "away_team": self.away_team,
+            "final_score_home": self.final_score_home,
+            "final_score_away": self.final_score_away,
+            "game_date": self.game_date,
+            "player_stats": [line.to_dict() for line in self.player_lines],
+            "team_stats": [line.to_dict() for line in self.team_lines],
+            "goalie_stats": [line.to_dict() for line in self.goalie_lines]
+        }
@@ -31,10 +31,13 @@ class Game(BaseModel):
     final_score_home: int
     final_score_away: int
     created_at: datetime
+    parser_version: Optional[int] = None
+    # hockey-reference game key of the shared canonical game
+    game_key: Optional[str] = None
 
 class PlayerStat(BaseModel):
     id: str
-    game_id: str
+    game_key: str
     player_name: str
     team: str
     position: str
@@ -51,10 +54,27 @@ class PlayerStat(BaseModel):
     faceoff_wins: int
     faceoff_losses: int
     toi_seconds: int
+    shot_attempts: Optional[int] = None
+    corsi_for: Optional[int] = None
+    corsi_against: Optional[int] = None
+    offensive_zone_starts: Optional[int] = None
+    defensive_zone_starts: Optional[int] = None
+
+class GoalieStat(BaseModel):
+    game_key: str
+    player_name: str
+    team: str
+    decision: Optional[str] = None
+    goals_against: int
+    shots_against: int
+    saves: int
+    shutouts: int
+    pim: int
+    toi_seconds: int
 
 class TeamStat(BaseModel):
     id: str
-    game_id: str
+    game_key: str
     team_name: str
     is_home: bool
     goals: int
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from typing import List, Optional
 from models.schemas import Game, GameCreate, User
-from routers.auth import get_current_user
+from routers.auth import get_current_user, get_admin_user
 from config.database import supabase
-from services.hockey_parser import parse_hockey_reference_url
+from services.hockey_parser import PARSER_VERSION
 from services.task_queue import task_queue, TaskStatus
 from services.arena_service import ArenaService
-from datetime import datetime
+from services.game_registry import game_registry
+from services.game_urls import game_key_from_url
+from services.saved_pages import resolve_import_source, count_saved_pages
+from services.schedule_crawler import discover_box_score_urls
+from services.url_stream import iter_upload_urls, batched, UPLOAD_LOOKUP_BATCH
+from datetime import datetime, date
+import asyncio
 import re
 
 router = APIRouter()
@@ -20,12 +26,22 @@ async def create_game(
         print(f"Adding game: {game_data.hockey_reference_url}")
         print(f"Date attended: {game_data.date_attended}")
         
-        # Parse the hockey reference URL
-        parsed_data = parse_hockey_reference_url(game_data.hockey_reference_url)
-        print(f"Parsed data: {parsed_data}")
+        # Same check as the bulk preflight: one games row per user per game
+        game_key = game_key_from_url(game_data.hockey_reference_url)
+        if game_key and await asyncio.to_thread(game_registry.user_game_keys, current_user.id, [game_key]):
+            raise HTTPException(status_code=400, detail="Game already added")
+        
+        # Look the game up in the shared registry, fetching and parsing the
+        # hockey reference URL only if no one has added it yet
+        try:
+            # A single game has nothing to batch its write with
+            canonical = await game_registry.ensure(game_data.hockey_reference_url, linger=0)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        print(f"Parsed game: {game_registry.matchup(canonical)}")
         
         # Use extracted date from URL if available, otherwise fall back to user input
-        game_date = parsed_data.get("game_date")
+        game_date = canonical.get("game_date")
         if game_date:
             date_attended = game_date
             print(f"Using extracted date from URL: {date_attended}")
@@ -37,16 +53,15 @@ async def create_game(
         game_record = {
             "user_id": current_user.id,
             "hockey_reference_url": game_data.hockey_reference_url,
+            "game_key": canonical["game_key"],
             "date_attended": date_attended,
-            "home_team": parsed_data["home_team"],
-            "away_team": parsed_data["away_team"],
-            "final_score_home": parsed_data["final_score_home"],
-            "final_score_away": parsed_data["final_score_away"],
+            **game_registry.game_fields(canonical),
             "created_at": datetime.utcnow().isoformat()
         }
         
         print(f"Creating game record: {game_record}")
-        result = supabase.table("games").insert(game_record).execute()
+        # Database calls block, so they run off the event loop
+        result = await asyncio.to_thread(lambda: supabase.table("games").insert(game_record).execute())
         print(f"Game creation result: {result}")
         
         if not result.data:
@@ -55,21 +70,11 @@ async def create_game(
         game_id = result.data[0]["id"]
         print(f"Created game with ID: {game_id}")
         
-        # Store player stats
-        print(f"Storing {len(parsed_data['player_stats'])} player stats")
-        for player_stat in parsed_data["player_stats"]:
-            player_stat["game_id"] = game_id
-            supabase.table("player_stats").insert(player_stat).execute()
-        
-        # Store team stats
-        print(f"Storing {len(parsed_data['team_stats'])} team stats")
-        for team_stat in parsed_data["team_stats"]:
-            team_stat["game_id"] = game_id
-            supabase.table("team_stats").insert(team_stat).execute()
-        
-        print("Successfully created game and stats")
+        print("Successfully created game")
         return Game(**result.data[0])
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error processing game: {str(e)}")
         import traceback
@@ -155,9 +160,7 @@ async def delete_game(
     if not result.data:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Delete related records
-    supabase.table("player_stats").delete().eq("game_id", game_id).execute()
-    supabase.table("team_stats").delete().eq("game_id", game_id).execute()
+    # Stats belong to the shared canonical game, so only the user's record goes
     supabase.table("games").delete().eq("id", game_id).execute()
     
     return {"message": "Game deleted successfully"}
@@ -190,29 +193,20 @@ async def create_bulk_games(
         if not urls:
             raise HTTPException(status_code=400, detail="No valid Hockey Reference URLs found")
         
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_urls = []
-        for url in urls:
-            if url not in seen:
-                seen.add(url)
-                unique_urls.append(url)
+        # Remove duplicates and games the user already has, in one lookup
+        unique_urls, skipped = await asyncio.to_thread(game_registry.new_game_urls, current_user.id, urls)
         
         # Create task
-        task_id = task_queue.create_task(len(unique_urls))
+        task_id = task_queue.create_task(len(unique_urls), current_user.id)
         
         # Start background processing
-        background_tasks.add_task(
-            task_queue.process_bulk_games,
-            task_id,
-            unique_urls,
-            current_user.id
-        )
+        task_queue.submit(background_tasks, task_id, "bulk", current_user.id, unique_urls)
         
         return {
             "task_id": task_id,
             "total_urls": len(unique_urls),
-            "message": f"Started processing {len(unique_urls)} games. Use the task_id to check progress."
+            "skipped": skipped,
+            "message": f"Started processing {len(unique_urls)} games ({skipped} already added). Use the task_id to check progress."
         }
         
     except HTTPException:
@@ -221,31 +215,139 @@ async def create_bulk_games(
         print(f"Error starting bulk processing: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error starting bulk processing: {str(e)}")
 
+@router.post("/bulk/stream")
+async def stream_bulk_games(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Start bulk processing from a streamed upload of Hockey Reference URLs:
+    a multipart file, NDJSON or plain text with one URL per line. Games are
+    queued as their lines arrive, so processing starts before a large
+    upload finishes.
+    """
+    task_id = task_queue.create_task(0, current_user.id)
+    task_queue.open_stream(task_id, current_user.id)
+    
+    total_urls = 0
+    skipped = 0
+    # Games the upload itself repeats
+    upload_counts = {"duplicates": 0}
+    upload_error = None
+    try:
+        # Check games against the user's collection a batch at a time
+        async for batch in batched(iter_upload_urls(request, upload_counts), UPLOAD_LOOKUP_BATCH):
+            new_urls, batch_skipped = await asyncio.to_thread(game_registry.new_game_urls, current_user.id, batch)
+            skipped += batch_skipped
+            await task_queue.add_items(task_id, new_urls)
+            total_urls += len(new_urls)
+    except Exception as e:
+        # Keep processing whatever arrived before the upload broke off
+        print(f"Error reading bulk upload: {str(e)}")
+        upload_error = f"Upload stopped after {total_urls} URLs: {str(e)}"
+    finally:
+        task_queue.close_items(task_id, upload_error)
+    skipped += upload_counts["duplicates"]
+    
+    if not total_urls and not skipped:
+        raise HTTPException(status_code=400, detail="No valid Hockey Reference URLs found")
+    
+    return {
+        "task_id": task_id,
+        "total_urls": total_urls,
+        "skipped": skipped,
+        "message": f"Started processing {total_urls} games ({skipped} already added). Use the task_id to check progress."
+    }
+
+class ScheduleDiscoveryRequest(BaseModel):
+    # hockey-reference team abbreviation, e.g. VEG
+    team: str
+    # Season by the year it ends (2023 = 2022-23), or a date range instead
+    season: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    # Only queue games on these days (the ones the user attended)
+    dates: Optional[List[date]] = None
+
+@router.post("/discover")
+async def discover_games(
+    background_tasks: BackgroundTasks,
+    request: ScheduleDiscoveryRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Find a team's box scores from its schedule page and queue them for bulk processing"""
+    try:
+        try:
+            urls = await discover_box_score_urls(
+                request.team,
+                season=request.season,
+                start_date=request.start_date,
+                end_date=request.end_date,
+                dates=request.dates
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if not urls:
+            raise HTTPException(status_code=404, detail="No games found on the schedule for those dates")
+        
+        urls, skipped = await asyncio.to_thread(game_registry.new_game_urls, current_user.id, urls)
+        
+        # Create task
+        task_id = task_queue.create_task(len(urls), current_user.id)
+        
+        # Start background processing
+        task_queue.submit(background_tasks, task_id, "bulk", current_user.id, urls)
+        
+        return {
+            "task_id": task_id,
+            "total_urls": len(urls),
+            "skipped": skipped,
+            "urls": urls,
+            "message": f"Found {len(urls) + skipped} games, {skipped} already added. Use the task_id to check progress."
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error discovering games: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error discovering games: {str(e)}")
+
 @router.post("/reprocess-all")
 async def reprocess_all_games(
     background_tasks: BackgroundTasks,
+    force: bool = Query(False),
+    refresh: bool = Query(False),
     current_user: User = Depends(get_current_user)
 ):
-    """Reprocess all existing games for the current user"""
+    """
+    Reprocess the current user's games that were parsed by an older parser
+    version (or all of them with force=true). With refresh=true every game
+    is revalidated against hockey-reference and changed pages re-derived.
+    """
     try:
         # Get all existing games for the user
-        user_games = supabase.table("games").select("id, hockey_reference_url").eq("user_id", current_user.id).execute()
+        user_games = await asyncio.to_thread(
+            lambda: supabase.table("games").select("id, hockey_reference_url, parser_version").eq("user_id", current_user.id).execute()
+        )
         
         if not user_games.data:
             return {"message": "No games found to reprocess"}
         
-        game_urls = [(game["id"], game["hockey_reference_url"]) for game in user_games.data]
+        game_urls = [
+            (game["id"], game["hockey_reference_url"], game.get("parser_version"))
+            for game in user_games.data
+            if force or refresh or (game.get("parser_version") or 0) < PARSER_VERSION
+        ]
+        
+        if not game_urls:
+            return {"message": "All games are up to date with the current parser"}
         
         # Create task
-        task_id = task_queue.create_task(len(game_urls))
+        task_id = task_queue.create_task(len(game_urls), current_user.id)
         
         # Start background processing
-        background_tasks.add_task(
-            task_queue.process_reprocess_games,
-            task_id,
-            game_urls,
-            current_user.id
-        )
+        task_queue.submit(background_tasks, task_id, "reprocess", current_user.id, game_urls, refresh=refresh)
         
         return {
             "task_id": task_id,
@@ -259,6 +361,54 @@ async def reprocess_all_games(
         print(f"Error starting bulk processing: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error starting bulk processing: {str(e)}")
 
+class SavedPagesImportRequest(BaseModel):
+    # Directory or tar archive, relative to BOX_SCORE_IMPORT_DIR on the server
+    path: str
+    # Owner of the imported games; defaults to the admin making the request
+    user_email: Optional[str] = None
+
+@router.post("/import")
+async def import_saved_pages(
+    background_tasks: BackgroundTasks,
+    request: SavedPagesImportRequest,
+    current_user: User = Depends(get_admin_user)
+):
+    """Start an offline import of saved box score pages for a user"""
+    try:
+        try:
+            source = resolve_import_source(request.path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        user_id = current_user.id
+        if request.user_email:
+            user_result = supabase.table("users").select("id").eq("email", request.user_email).execute()
+            if not user_result.data:
+                raise HTTPException(status_code=404, detail="User not found")
+            user_id = user_result.data[0]["id"]
+        
+        total_pages = await asyncio.to_thread(count_saved_pages, str(source))
+        if not total_pages:
+            raise HTTPException(status_code=400, detail="No saved box score pages found")
+        
+        # Create task
+        task_id = task_queue.create_task(total_pages, current_user.id)
+        
+        # Start background processing
+        task_queue.submit(background_tasks, task_id, "import", user_id, [], source=str(source))
+        
+        return {
+            "task_id": task_id,
+            "total_pages": total_pages,
+            "message": f"Started importing {total_pages} saved pages. Use the task_id to check progress."
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error starting import: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error starting import: {str(e)}")
+
 @router.get("/bulk/{task_id}")
 async def get_bulk_task_status(
     task_id: str,
@@ -267,7 +417,8 @@ async def get_bulk_task_status(
     """Get the status of a bulk processing task"""
     task = task_queue.get_task(task_id)
     
-    if not task:
+    # Someone else's task looks the same as a missing one
+    if not task or task.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Task not found")
     
     return {
@@ -279,6 +430,9 @@ async def get_bulk_task_status(
         "failed_items": task.failed_items,
         "results": task.results,
         "errors": task.errors,
+        "accepting_items": task.accepting_items,
+        "stage_totals_ms": task.stage_totals_ms,
+        "byte_totals": task.byte_totals,
         "created_at": task.created_at.isoformat(),
         "updated_at": task.updated_at.isoformat()
     }
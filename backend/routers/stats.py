@@ -109,18 +109,17 @@ async def get_player_game_stats(
         if not user_games.data:
             return []
         
-        game_ids = [game["id"] for game in user_games.data]
-        
-        # Create a mapping of game_id to game info
-        games_lookup = {game["id"]: game for game in user_games.data}
+        # Stats are stored once per canonical game, keyed by game_key
+        games_lookup = {game["game_key"]: game for game in user_games.data if game.get("game_key")}
+        game_keys = list(games_lookup)
         
         # Get player stats for this specific player across all user's games
-        result = supabase.table("player_stats").select("*").eq("player_name", player_name).in_("game_id", game_ids).execute()
+        result = supabase.table("player_stats").select("*").eq("player_name", player_name).in_("game_key", game_keys).execute()
         
         # Combine player stats with game information
         player_games = []
         for stat in result.data:
-            game_info = games_lookup.get(stat["game_id"])
+            game_info = games_lookup.get(stat["game_key"])
             if game_info:
                 player_game = {
                     "id": stat["id"],
@@ -172,18 +171,17 @@ async def get_team_game_stats(
         if not user_games.data:
             return []
         
-        game_ids = [game["id"] for game in user_games.data]
-        
-        # Create a mapping of game_id to game info
-        games_lookup = {game["id"]: game for game in user_games.data}
+        # Stats are stored once per canonical game, keyed by game_key
+        games_lookup = {game["game_key"]: game for game in user_games.data if game.get("game_key")}
+        game_keys = list(games_lookup)
         
         # Get team stats for this specific team across all user's games
-        result = supabase.table("team_stats").select("*").eq("team_name", team_name).in_("game_id", game_ids).execute()
+        result = supabase.table("team_stats").select("*").eq("team_name", team_name).in_("game_key", game_keys).execute()
         
         # Combine team stats with game information
         team_games = []
         for stat in result.data:
-            game_info = games_lookup.get(stat["game_id"])
+            game_info = games_lookup.get(stat["game_key"])
             if game_info:
                 team_game = {
                     "id": stat["id"],
@@ -229,11 +227,16 @@ async def get_stats_summary(current_user: User = Depends(get_current_user)):
             "total_goals_witnessed": 0
         }
     
-    game_ids = [game["id"] for game in games]
+    game_keys = list({game["game_key"] for game in games if game.get("game_key")})
     
     # Get team stats
-    team_stats_result = supabase.table("team_stats").select("*").in_("game_id", game_ids).execute()
-    team_stats = team_stats_result.data
+    team_stats_result = supabase.table("team_stats").select("*").in_("game_key", game_keys).execute()
+    stats_by_key = {}
+    for stat in team_stats_result.data:
+        stats_by_key.setdefault(stat["game_key"], []).append(stat)
+    
+    # Count a game once per attendance, as before stats were shared
+    team_stats = [stat for game in games for stat in stats_by_key.get(game.get("game_key"), [])]
     
     # Calculate summary statistics
     teams_seen = list(set([stat["team_name"] for stat in team_stats]))
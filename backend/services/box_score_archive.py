@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from services.game_urls import canonical_game_url, game_key_from_url
+
+ARCHIVE_ENABLED = os.getenv("BOX_SCORE_ARCHIVE", "true").lower() == "true"
+ARCHIVE_DIR = os.getenv("BOX_SCORE_ARCHIVE_DIR", str(Path(__file__).parent.parent / "archive" / "box_scores"))
+
+
+@dataclass
+class ArchiveEntry:
+    """Fetch metadata for one archived box score"""
+    url: str
+    content_sha256: str
+    size: int
+    fetched_at: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Last time hockey-reference confirmed the copy is current (HTTP 304)
+    validated_at: Optional[str] = None
+
+
+class BoxScoreArchive:
+    """
+    Local archive of fetched box score HTML.
+
+    Pages are stored gzip-compressed under their content hash
+    (blobs/ab/abcd....html.gz) so identical content is kept once, and each
+    canonical game URL has a small JSON entry (entries/<game key>.json)
+    pointing at its blob along with the fetch metadata.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.entries_dir = self.root / "entries"
+
+    def _entry_path(self, url: str) -> Path:
+        game_key = game_key_from_url(url)
+        if not game_key:
+            # Not a standard box score filename; key by the URL itself
+            game_key = hashlib.sha256(canonical_game_url(url).encode("utf-8")).hexdigest()
+        return self.entries_dir / f"{game_key}.json"
+
+    def _blob_path(self, content_sha256: str) -> Path:
+        return self.blobs_dir / content_sha256[:2] / f"{content_sha256}.html.gz"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_entry(self, url: str) -> Optional[ArchiveEntry]:
+        """Fetch metadata for a game, or None if it isn't archived"""
+        try:
+            with open(self._entry_path(url), "r") as f:
+                return ArchiveEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading archive entry for {url}: {e}")
+            return None
+
+    def has(self, url: str) -> bool:
+        entry = self.get_entry(url)
+        return entry is not None and self._blob_path(entry.content_sha256).exists()
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Raw HTML for a game, or None if it isn't archived"""
+        entry = self.get_entry(url)
+        if not entry:
+            return None
+        try:
+            with gzip.open(self._blob_path(entry.content_sha256), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading archived page for {url}: {e}")
+            return None
+
+    def put(self, url: str, content: bytes, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> ArchiveEntry:
+        """Store a fetched page and point the game's entry at it"""
+        content_sha256 = hashlib.sha256(content).hexdigest()
+
+        blob_path = self._blob_path(content_sha256)
+        if not blob_path.exists():
+            self._write_atomic(blob_path, gzip.compress(content))
+
+        entry = ArchiveEntry(
+            url=canonical_game_url(url),
+            content_sha256=content_sha256,
+            size=len(content),
+            fetched_at=datetime.utcnow().isoformat(),
+            etag=etag,
+            last_modified=last_modified
+        )
+        self._write_atomic(self._entry_path(url), json.dumps(asdict(entry)).encode("utf-8"))
+        return entry
+
+    def mark_validated(self, url: str):
+        """Record that a revalidation found the archived copy unchanged"""
+        entry = self.get_entry(url)
+        if entry:
+            entry.validated_at = datetime.utcnow().isoformat()
+            self._write_atomic(self._entry_path(url), json.dumps(asdict(entry)).encode("utf-8"))
+
+
+# Global archive instance
+box_score_archive = BoxScoreArchive(ARCHIVE_DIR)
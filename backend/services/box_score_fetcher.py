@@ -0,0 +1,119 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.box_score_archive import box_score_archive, ARCHIVE_ENABLED
+
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "30"))
+FETCH_POOL_SIZE = int(os.getenv("FETCH_POOL_SIZE", "4"))
+FETCH_USER_AGENT = os.getenv("FETCH_USER_AGENT", "HockeyStatsTracker/1.0 (+box score importer)")
+
+try:
+    # urllib3 only decodes brotli responses when a brotli package is installed
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one box score"""
+    content: Optional[bytes]
+    from_archive: bool = False
+    # The archived copy was revalidated and hockey-reference answered 304
+    not_modified: bool = False
+
+
+_session: Optional[requests.Session] = None
+
+
+def get_http_session() -> requests.Session:
+    """Keep-alive session shared by every hockey-reference fetch"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=FETCH_POOL_SIZE, pool_maxsize=FETCH_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": FETCH_USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        })
+        _session = session
+    return _session
+
+
+def fetch_box_score(url: str, revalidate: bool = False) -> FetchResult:
+    """
+    Fetch a box score, preferring the local archive.
+
+    With revalidate=True an archived game is checked against hockey-reference
+    with If-None-Match / If-Modified-Since. A 304 comes back as
+    not_modified with no content, so the caller can skip parsing entirely.
+    """
+    archived = ARCHIVE_ENABLED and box_score_archive.has(url)
+
+    if archived and not revalidate:
+        content = box_score_archive.get(url)
+        if content is not None:
+            return FetchResult(content=content, from_archive=True)
+        archived = False
+
+    headers = {}
+    if archived:
+        entry = box_score_archive.get_entry(url)
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = get_http_session().get(
+        url,
+        headers=headers,
+        timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT)
+    )
+
+    if response.status_code == 304:
+        if not headers:
+            # Nothing of ours to be "not modified" against
+            raise requests.HTTPError(f"Unexpected 304 Not Modified for {url} without an archived copy", response=response)
+        box_score_archive.mark_validated(url)
+        return FetchResult(content=None, from_archive=True, not_modified=True)
+
+    response.raise_for_status()
+    if not response.content:
+        raise ValueError(f"Empty response for {url}")
+
+    if ARCHIVE_ENABLED:
+        try:
+            box_score_archive.put(
+                url,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        except Exception as e:
+            print(f"Error archiving {url}: {e}")
+
+    return FetchResult(content=response.content)
+
+
+def fetch_box_score_html(url: str) -> bytes:
+    """
+    Raw HTML for a box score URL.
+
+    Served from the local archive when the game has already been fetched;
+    otherwise downloaded from hockey-reference and archived.
+    """
+    return fetch_box_score(url).content
+
+
+def is_archived(url: str) -> bool:
+    """True when fetching this URL won't touch the network"""
+    return ARCHIVE_ENABLED and box_score_archive.has(url)
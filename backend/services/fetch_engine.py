@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, AsyncIterator, Tuple, Union
+from urllib.parse import urlparse
+
+from services.box_score_fetcher import fetch_box_score, is_archived, FetchResult
+from services.stage_timings import stage, add_bytes
+
+# Politeness limit per host: sustained requests/second and burst size.
+# The default matches the old fixed 2 second delay between requests.
+FETCH_RATE_PER_SECOND = float(os.getenv("FETCH_RATE_PER_SECOND", "0.5"))
+FETCH_BURST = int(os.getenv("FETCH_BURST", "1"))
+# Downloads in flight at once across all hosts
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "2"))
+
+
+class TokenBucket:
+    """
+    Async token bucket. Tokens refill continuously at `rate` per second up
+    to `burst`, so time spent downloading counts toward the next request's
+    spacing instead of being added on top of it.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchEngine:
+    """
+    Non-blocking box score fetcher.
+
+    Downloads run in worker threads so the event loop keeps serving
+    requests, paced by a per-host token bucket and capped by a global
+    concurrency limit. Archived pages skip both.
+    """
+
+    def __init__(self, rate: float = FETCH_RATE_PER_SECOND, burst: int = FETCH_BURST,
+                 concurrency: int = FETCH_CONCURRENCY):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = max(1, concurrency)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc.lower()
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self.buckets[host] = bucket
+        return bucket
+
+    async def fetch(self, url: str, revalidate: bool = False) -> FetchResult:
+        """
+        Fetch one box score without blocking the event loop. Time spent
+        waiting for a download slot is "fetch" minus the two stages in it.
+        """
+        if not revalidate and is_archived(url):
+            with stage("archive_read"):
+                result = await asyncio.to_thread(fetch_box_score, url)
+        else:
+            with stage("fetch"):
+                async with self.semaphore:
+                    with stage("rate_limit_wait"):
+                        await self._bucket(url).acquire()
+                    with stage("download"):
+                        result = await asyncio.to_thread(fetch_box_score, url, revalidate)
+
+        if result.content:
+            add_bytes("archive" if result.from_archive else "download", len(result.content))
+        return result
+
+    async def fetch_in_order(self, urls: List[str], revalidate: bool = False,
+                             window: Optional[int] = None) -> AsyncIterator[Tuple[str, Union[FetchResult, Exception]]]:
+        """
+        Yield (url, result) in input order while keeping up to `window`
+        fetches running ahead of the consumer. A failed fetch yields its
+        exception instead of stopping the stream.
+        """
+        async for url, result in self.run_in_order(urls, lambda url: self.fetch(url, revalidate), window):
+            yield url, result
+
+    async def run_in_order(self, urls: Union[Iterable[str], AsyncIterable[str]],
+                           load: Callable[[str], Awaitable[Any]],
+                           window: Optional[int] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yield (url, await load(url)) in input order with up to `window`
+        loads running ahead of the consumer. A failed load yields its
+        exception instead of stopping the stream.
+
+        urls may be an async iterable (e.g. an upload still being read);
+        loads start as soon as each URL arrives.
+        """
+        window = window or self.concurrency
+        pending: List[Tuple[str, asyncio.Task]] = []
+        if isinstance(urls, AsyncIterable):
+            remaining = aiter(urls)
+        else:
+            remaining = iter(urls)
+
+        async def schedule_next() -> bool:
+            if isinstance(remaining, AsyncIterator):
+                url = await anext(remaining, None)
+            else:
+                url = next(remaining, None)
+            if url is None:
+                return False
+            pending.append((url, asyncio.ensure_future(load(url))))
+            return True
+
+        for _ in range(window):
+            if not await schedule_next():
+                break
+
+        try:
+            while pending:
+                url, task = pending.pop(0)
+                try:
+                    result = await task
+                except Exception as e:
+                    result = e
+                await schedule_next()
+                yield url, result
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+# Global fetch engine instance
+fetch_engine = FetchEngine()
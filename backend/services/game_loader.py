@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from models.parsed_game import ParsedGame
+from services.fetch_engine import fetch_engine
+from services.game_urls import canonical_game_url
+from services.parse_pool import parse_pool
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller starts the work; callers arriving while it is still
+    running await the same future and get the same result or exception.
+    The key is released as soon as the call finishes, so later callers
+    start fresh.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self.calls
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn(*args))
+            self.calls[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        # One caller giving up must not cancel the work the others are awaiting
+        return await asyncio.shield(future)
+
+    def _release(self, key: Hashable, future: asyncio.Future):
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        if not future.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            future.exception()
+
+
+class GameLoader:
+    """
+    Fetch-and-parse of one box score, shared between concurrent callers.
+
+    Single game adds, bulk imports and reprocessing all load pages through
+    here, so the same game requested from several places at once is
+    downloaded and parsed once, keyed by its canonical URL.
+    """
+
+    def __init__(self):
+        self.flights = SingleFlight()
+
+    async def load(self, url: str, parse: Callable[[bytes, str], ParsedGame],
+                   revalidate: bool = False) -> Optional[ParsedGame]:
+        """
+        Parsed game for a box score URL.
+
+        parse is the parser's parse_box_score. With revalidate=True, None
+        means hockey-reference reported the archived copy as unchanged.
+        The page is fetched, archived and parsed under its canonical URL,
+        whichever spelling of it the caller passed.
+        """
+        url = canonical_game_url(url)
+        return await self.flights.do((url, revalidate), self._load, url, parse, revalidate)
+
+    async def _load(self, url: str, parse: Callable[[bytes, str], ParsedGame],
+                    revalidate: bool) -> Optional[ParsedGame]:
+        fetched = await fetch_engine.fetch(url, revalidate)
+        if fetched.not_modified:
+            return None
+        return await parse_pool.run(parse, fetched.content, url)
+
+
+# Global game loader instance
+game_loader = GameLoader()
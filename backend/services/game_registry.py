@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from models.parsed_game import ParsedGame
+from services.hockey_parser import parse_box_score, PARSER_VERSION
+from services.game_loader import game_loader, SingleFlight
+from services.game_urls import BOX_SCORE_BASE_URL, game_key_from_url
+from services.ingest_scheduler import ingest_scheduler
+from services.stage_timings import stage
+from services.write_buffer import WriteBuffer
+from config.database import supabase
+
+# Columns copied from the canonical game onto each user's games row
+CANONICAL_GAME_FIELDS = ("home_team", "away_team", "final_score_home", "final_score_away", "parser_version")
+# Keys per lookup: keeps the in.() filter URL short and the result under
+# PostgREST's row limit
+KEY_LOOKUP_BATCH = 500
+
+
+class GameRegistry:
+    """
+    Canonical games shared by every user.
+
+    Each box score is stored once in canonical_games, keyed by its
+    hockey-reference game key, with its player, team and goalie stats
+    hanging off that key. A user's games row only records attendance and
+    points at the canonical game through game_key, so adding a game someone
+    else already added costs one lookup instead of a fetch and parse.
+    """
+
+    def __init__(self):
+        self.flights = SingleFlight()
+        self.writes = WriteBuffer(self.write_games)
+
+    def get(self, game_key: str) -> Optional[Dict[str, Any]]:
+        result = supabase.table("canonical_games").select("*").eq("game_key", game_key).execute()
+        return result.data[0] if result.data else None
+
+    def get_many(self, game_keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        game_keys = list(set(game_keys))
+        if not game_keys:
+            return {}
+        result = supabase.table("canonical_games").select("*").in_("game_key", game_keys).execute()
+        return {row["game_key"]: row for row in result.data}
+
+    def user_game_keys(self, user_id: str, game_keys: Iterable[str]) -> Set[str]:
+        """Which of game_keys the user already has a games row for"""
+        game_keys = list(set(game_keys))
+        existing = set()
+        for start in range(0, len(game_keys), KEY_LOOKUP_BATCH):
+            batch = game_keys[start:start + KEY_LOOKUP_BATCH]
+            result = supabase.table("games").select("game_key").eq("user_id", user_id).in_("game_key", batch).execute()
+            existing.update(row["game_key"] for row in result.data)
+        return existing
+
+    def new_game_urls(self, user_id: str, urls: Iterable[str]) -> Tuple[List[str], int]:
+        """
+        Drop URLs for games the user already has, or that repeat an earlier
+        URL for the same game. Returns the URLs to queue and how many were
+        skipped. URLs without a game key are kept so they fail visibly.
+        """
+        urls = [url.strip() for url in urls]
+        existing = self.user_game_keys(user_id, filter(None, map(game_key_from_url, urls)))
+        new_urls = []
+        for url in urls:
+            game_key = game_key_from_url(url)
+            if game_key in existing:
+                continue
+            if game_key:
+                existing.add(game_key)
+            new_urls.append(url)
+        return new_urls, len(urls) - len(new_urls)
+
+    @staticmethod
+    def is_current(canonical: Optional[Dict[str, Any]]) -> bool:
+        """True when the canonical game was parsed by the current parser"""
+        return canonical is not None and (canonical.get("parser_version") or 0) >= PARSER_VERSION
+
+    async def store(self, game_key: str, parsed_game: ParsedGame, linger: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Write (or rewrite) a canonical game and replace its stats. The write
+        is batched with other games being stored at the same time; linger
+        overrides how long it waits for them (0 for a lone game).
+        """
+        canonical = {
+            "game_key": game_key,
+            "hockey_reference_url": f"{BOX_SCORE_BASE_URL}{game_key}.html",
+            "game_date": parsed_game.game_date,
+            **parsed_game.game_fields(),
+            "updated_at": datetime.now().isoformat()
+        }
+        stats = {
+            "player_stats": parsed_game.player_rows(game_key),
+            "team_stats": parsed_game.team_rows(game_key),
+            "goalie_stats": parsed_game.goalie_rows(game_key),
+        }
+        with stage("db_batch_write"):
+            return await self.writes.submit((canonical, stats), linger)
+
+    async def derive(self, game_key: str, load, *args) -> Optional[Dict[str, Any]]:
+        """Store the game await load(*args) parses; None if it returns nothing"""
+        parsed_game = await load(*args)
+        if parsed_game is None:
+            return None
+        return await self.store(game_key, parsed_game)
+
+    async def write_games(self, games: List[Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]]) -> List[Dict[str, Any]]:
+        """
+        Write a batch of (canonical row, stats rows by table) in one
+        ingest_games call, off the event loop. The database upserts the
+        canonical rows and replaces their stats in one transaction, so a
+        failure leaves every game in the batch as it was.
+        """
+        # A game stored twice in one batch is written once, with its latest parse
+        latest = {canonical["game_key"]: (canonical, stats) for canonical, stats in games}
+        payload = [{"canonical": canonical, **stats} for canonical, stats in latest.values()]
+        result = await asyncio.to_thread(lambda: supabase.rpc("ingest_games", {"games": payload}).execute())
+
+        stored = {game_key: canonical for game_key, (canonical, _) in latest.items()}
+        stored.update((row["game_key"], row) for row in result.data)
+        return [stored[canonical["game_key"]] for canonical, _ in games]
+
+    async def ensure(self, url: str, user_id: Optional[str] = None, linger: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Canonical game for a box score URL, fetching and parsing it only
+        when it isn't registered yet or was parsed by an older parser.
+        Concurrent calls for the same game share one load. With user_id the
+        fetch and parse wait for that user's turn in the ingestion
+        scheduler; the lookup and the write don't hold a worker slot.
+        linger is passed on to store().
+        """
+        game_key = game_key_from_url(url)
+        if not game_key:
+            raise ValueError(f"Not a hockey-reference box score URL: {url}")
+        # Fetched as the canonical URL, not whichever spelling arrived first
+        url = f"{BOX_SCORE_BASE_URL}{game_key}.html"
+        return await self.flights.do(game_key, self._ensure, game_key, url, user_id, linger)
+
+    async def _ensure(self, game_key: str, url: str, user_id: Optional[str], linger: Optional[float]) -> Dict[str, Any]:
+        with stage("db_lookup"):
+            canonical = await asyncio.to_thread(self.get, game_key)
+        if self.is_current(canonical):
+            return canonical
+        if user_id is None:
+            parsed_game = await game_loader.load(url, parse_box_score)
+        else:
+            parsed_game = await ingest_scheduler.run(user_id, game_loader.load, url, parse_box_score)
+        return await self.store(game_key, parsed_game, linger)
+
+    @staticmethod
+    def game_fields(canonical: Dict[str, Any]) -> Dict[str, Any]:
+        """Canonical columns of a user's games row"""
+        return {field: canonical.get(field) for field in CANONICAL_GAME_FIELDS}
+
+    @staticmethod
+    def matchup(canonical: Dict[str, Any]) -> str:
+        return f"{canonical.get('away_team')} @ {canonical.get('home_team')}"
+
+
+# Global game registry instance
+game_registry = GameRegistry()
@@ -0,0 +1,31 @@
+import re
+from typing import Optional
+
+BOX_SCORE_BASE_URL = "https://www.hockey-reference.com/boxscores/"
+
+# Box score filenames are YYYYMMDD + game number + home team, e.g. 202306130VEG
+GAME_KEY_PATTERN = re.compile(r'(\d{8}\d[A-Za-z]{3})(?:\.html?)?$')
+
+
+def game_key_from_url(url: str) -> Optional[str]:
+    """Extract the hockey-reference game key (e.g. 202306130VEG) from a box score URL or filename"""
+    if not url:
+        return None
+
+    # Drop query string / fragment and take the last path segment
+    filename = url.strip().split('?')[0].split('#')[0].rstrip('/').split('/')[-1]
+    match = GAME_KEY_PATTERN.search(filename)
+    if match:
+        return match.group(1).upper()
+    return None
+
+
+def canonical_game_url(url: str) -> str:
+    """
+    Normalize a box score URL so http/https, www/no-www, query strings and
+    filename case all map to the same game.
+    """
+    game_key = game_key_from_url(url)
+    if game_key:
+        return f"{BOX_SCORE_BASE_URL}{game_key}.html"
+    return url.strip()
@@ -1,36 +1,228 @@
-import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag, Comment
 import pandas as pd
+import os
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from functools import cached_property
+from models.parsed_game import ParsedGame, PlayerLine, TeamLine, GoalieLine
+from services.box_score_archive import box_score_archive
+from services.box_score_fetcher import fetch_box_score_html
+from services.stage_timings import timed_stage
+
+# Bump whenever a parser change alters the extracted stats; reprocess-all
+# re-derives every game that was parsed by an older version
+PARSER_VERSION = 2
+
+# BeautifulSoup tree builder used for box score pages: "html.parser" (stdlib)
+# or "lxml" (faster on full box score pages, needs lxml installed)
+PARSER_ENGINE = os.getenv("HOCKEY_PARSER_ENGINE", "html.parser")
+FALLBACK_ENGINE = "html.parser"
+
+# Build only the subtrees the extractors read instead of the whole page
+SCOPED_PARSE = os.getenv("HOCKEY_PARSER_SCOPED", "true").lower() == "true"
 
 def parse_hockey_reference_url(url: str) -> Dict[str, Any]:
     """
     Parse a hockey-reference.com box score URL and extract game data.
     """
+    return fetch_parsed_game(url).to_dict()
+
+def fetch_parsed_game(url: str) -> ParsedGame:
+    """
+    Fetch a hockey-reference.com box score URL and parse it into a ParsedGame.
+    """
+    
+    # Fetch the page content (served from the local archive when we have it)
+    content = fetch_box_score_html(url)
+    
+    return parse_box_score(content, url)
+
+def parse_archived_box_score(url: str) -> Optional[ParsedGame]:
+    """
+    Parse a box score from the local archive without touching the network.
+    Returns None when the game isn't archived. Runs in the parse pool.
+    """
+    content = box_score_archive.get(url)
+    if content is None:
+        return None
+    
+    return parse_box_score(content, url)
+
+def parse_hockey_reference_html(content, url: str) -> Dict[str, Any]:
+    """
+    Extract game data from the raw HTML of a hockey-reference.com box score.
+    """
+    return parse_box_score(content, url).to_dict()
+
+def parse_box_score(content, url: str) -> ParsedGame:
+    """Parse the raw HTML of a box score into a ParsedGame"""
+    return build_parsed_game(load_page(content), url)
+
+def build_parsed_game(page: "ParsedPage", url: str) -> ParsedGame:
+    """Run every extractor over a loaded page"""
+    player_lines = extract_player_lines(page)
+    apply_advanced_stats(page, player_lines)
+    
+    return ParsedGame(
+        home_team=page.home_team,
+        away_team=page.away_team,
+        final_score_home=page.home_score,
+        final_score_away=page.away_score,
+        # Extract game date from URL
+        game_date=extract_date_from_url(url),
+        player_lines=player_lines,
+        team_lines=extract_team_lines(page),
+        goalie_lines=extract_goalie_lines(page),
+        parser_version=PARSER_VERSION
+    )
+
+@timed_stage
+def load_page(content, engine: Optional[str] = None, scoped: Optional[bool] = None) -> "ParsedPage":
+    """
+    Build the page context with the configured parser engine.
+    
+    Falls back to html.parser when the engine isn't installed or the page
+    comes back without a scorebox or skater tables.
+    """
+    engine = engine or PARSER_ENGINE
+    parse_only = BOX_SCORE_STRAINER if (SCOPED_PARSE if scoped is None else scoped) else None
+    
+    if engine != FALLBACK_ENGINE:
+        try:
+            page = ParsedPage(BeautifulSoup(content, engine, parse_only=parse_only), engine)
+            if page.scorebox or page.skater_tables:
+                return page
+            print(f"Parser engine {engine} found no box score, retrying with {FALLBACK_ENGINE}")
+        except Exception as e:
+            print(f"Parser engine {engine} failed ({e}), retrying with {FALLBACK_ENGINE}")
     
-    # Extract game date from URL
-    game_date = extract_date_from_url(url)
+    return ParsedPage(BeautifulSoup(content, FALLBACK_ENGINE, parse_only=parse_only))
+
+# Tables hockey-reference usually ships inside HTML comments, rendered by
+# its JavaScript: per-team goalies and advanced (Corsi) stats
+HIDDEN_TABLE_SUFFIXES = ("_goalies", "_adv")
+
+def is_box_score_section(name: str, attrs: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    SoupStrainer filter for the page sections the extractors read: the title,
+    the scorebox, the *_skaters tables, the goalie and advanced tables (and
+    the wrappers whose HTML comments hide them) and the league scores
+    section. Navigation, ads, footers and everything else are never built.
+    """
+    if attrs is None:
+        # Only the tag name to go on: keep every candidate tag and let the
+        # extractors do the filtering
+        return name in ("title", "div", "table")
     
-    # Fetch the page content
-    response = requests.get(url)
-    response.raise_for_status()
+    if name == "title":
+        return True
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    if name == "div":
+        classes = attrs.get("class") or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        div_id = attrs.get("id") or ""
+        if div_id.startswith("all_") and div_id.endswith(HIDDEN_TABLE_SUFFIXES):
+            return True
+        return "scorebox" in classes or "scores" in classes or div_id == "scores"
     
-    # Extract basic game information
-    game_data = {
-        "home_team": extract_home_team(soup),
-        "away_team": extract_away_team(soup),
-        "final_score_home": extract_home_score(soup),
-        "final_score_away": extract_away_score(soup),
-        "game_date": game_date,
-        "player_stats": extract_player_stats(soup),
-        "team_stats": extract_team_stats(soup)
-    }
+    if name == "table":
+        table_id = attrs.get("id") or ""
+        return table_id.endswith(("_skaters",) + HIDDEN_TABLE_SUFFIXES)
+    
+    return False
+
+class BoxScoreStrainer(SoupStrainer):
+    """
+    bs4 >= 4.13 decides which tags to build through allow_tag_creation and
+    would otherwise call is_box_score_section with the tag name alone, which
+    keeps every div (the #wrap ancestor included) and so the whole page.
+    bs4 4.12 never calls this and passes the attributes to the function.
+    """
     
-    return game_data
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, Any]]) -> bool:
+        return is_box_score_section(name, attrs or {})
 
+BOX_SCORE_STRAINER = BoxScoreStrainer(is_box_score_section)
+
+class ParsedPage:
+    """
+    Page context for a single box score.
+    
+    Locates the scorebox, title, skater tables and scores section once so the
+    extractors below don't each search the whole document again. Goalie and
+    advanced tables are dug out of their comments on first use.
+    """
+    
+    def __init__(self, soup: BeautifulSoup, engine: str = FALLBACK_ENGINE):
+        self.soup = soup
+        self.engine = engine
+        self.scorebox = soup.find("div", {"class": "scorebox"})
+        self.title = soup.find("title")
+        self.skater_tables = soup.find_all("table", {"id": lambda x: x and x.endswith('_skaters')})
+        self.scores_section = soup.find("div", {"class": "scores"}) or soup.find("div", {"id": "scores"})
+        
+        if self.scorebox:
+            self.scorebox_strong = self.scorebox.find_all("strong")
+            self.scorebox_team_links = self.scorebox.find_all("a", href=re.compile(r"/teams/"))
+            self.score_divs = self.scorebox.find_all("div", {"class": "score"})
+        else:
+            self.scorebox_strong = []
+            self.scorebox_team_links = []
+            self.score_divs = []
+    
+    @cached_property
+    def home_team(self) -> str:
+        return extract_home_team(self)
+    
+    @cached_property
+    def away_team(self) -> str:
+        return extract_away_team(self)
+    
+    @cached_property
+    def home_score(self) -> int:
+        return extract_home_score(self)
+    
+    @cached_property
+    def away_score(self) -> int:
+        return extract_away_score(self)
+    
+    @cached_property
+    def goalie_tables(self) -> List[Tag]:
+        return find_hidden_tables(self.soup, "_goalies", self.engine)
+    
+    @cached_property
+    def advanced_tables(self) -> List[Tag]:
+        return find_hidden_tables(self.soup, "_adv", self.engine)
+
+def find_hidden_tables(soup: BeautifulSoup, suffix: str, engine: str = FALLBACK_ENGINE) -> List[Tag]:
+    """
+    Tables whose id ends in suffix, including the ones hockey-reference hides
+    in an HTML comment inside their all_<id> wrapper. Only those comment
+    blocks are parsed again, never the rest of the page.
+    """
+    tables = soup.find_all("table", {"id": lambda x: x and x.endswith(suffix)})
+    found = {table.get("id") for table in tables}
+    
+    for wrapper in soup.find_all("div", {"id": lambda x: x and x.startswith("all_") and x.endswith(suffix)}):
+        for comment in wrapper.find_all(string=lambda text: isinstance(text, Comment)):
+            if "<table" not in comment:
+                continue
+            fragment = BeautifulSoup(comment, engine)
+            for table in fragment.find_all("table", {"id": lambda x: x and x.endswith(suffix)}):
+                if table.get("id") not in found:
+                    found.add(table.get("id"))
+                    tables.append(table)
+    
+    return tables
+
+def as_parsed_page(page) -> ParsedPage:
+    """Accept either a ParsedPage or a bare BeautifulSoup document"""
+    if isinstance(page, ParsedPage):
+        return page
+    return ParsedPage(page)
+
+@timed_stage
 def extract_date_from_url(url: str) -> str:
     """Extract game date from hockey-reference URL"""
     try:
@@ -59,24 +251,26 @@ def extract_date_from_url(url: str) -> str:
         print(f"Error extracting date from URL: {e}")
         return None
 
-def extract_home_team(soup: BeautifulSoup) -> str:
+@timed_stage
+def extract_home_team(page: ParsedPage) -> str:
     """Extract home team name from the page"""
     try:
+        page = as_parsed_page(page)
+        
         # Method 1: Look for team names in the scorebox
-        scorebox = soup.find("div", {"class": "scorebox"})
-        if scorebox:
+        if page.scorebox:
             # Find strong tags or team name elements
-            team_elements = scorebox.find_all("strong")
+            team_elements = page.scorebox_strong
             if len(team_elements) >= 2:
                 return team_elements[1].text.strip()
             
             # Alternative: look for links to team pages
-            team_links = scorebox.find_all("a", href=re.compile(r"/teams/"))
+            team_links = page.scorebox_team_links
             if len(team_links) >= 2:
                 return team_links[1].text.strip()
         
         # Method 2: Check page title format "Away @ Home"
-        title = soup.find("title")
+        title = page.title
         if title:
             title_text = title.text
             # Pattern: "Team1 @ Team2" where Team2 is home
@@ -90,7 +284,7 @@ def extract_home_team(soup: BeautifulSoup) -> str:
                 return vs_match.group(1).strip()
         
         # Method 3: Look in table IDs for team abbreviations
-        tables = soup.find_all("table", {"id": lambda x: x and x.endswith('_skaters')})
+        tables = page.skater_tables
         if len(tables) >= 2:
             # Second table should be home team
             table_id = tables[1].get('id', '')
@@ -103,24 +297,26 @@ def extract_home_team(soup: BeautifulSoup) -> str:
         print(f"Error extracting home team: {e}")
         return "Unknown Home Team"
 
-def extract_away_team(soup: BeautifulSoup) -> str:
+@timed_stage
+def extract_away_team(page: ParsedPage) -> str:
     """Extract away team name from the page"""
     try:
+        page = as_parsed_page(page)
+        
         # Method 1: Look for team names in the scorebox
-        scorebox = soup.find("div", {"class": "scorebox"})
-        if scorebox:
+        if page.scorebox:
             # Find strong tags or team name elements
-            team_elements = scorebox.find_all("strong")
+            team_elements = page.scorebox_strong
             if len(team_elements) >= 1:
                 return team_elements[0].text.strip()
             
             # Alternative: look for links to team pages
-            team_links = scorebox.find_all("a", href=re.compile(r"/teams/"))
+            team_links = page.scorebox_team_links
             if len(team_links) >= 1:
                 return team_links[0].text.strip()
         
         # Method 2: Check page title format "Away @ Home"
-        title = soup.find("title")
+        title = page.title
         if title:
             title_text = title.text
             # Pattern: "Team1 @ Team2" where Team1 is away
@@ -134,7 +330,7 @@ def extract_away_team(soup: BeautifulSoup) -> str:
                 return vs_match.group(1).strip()
         
         # Method 3: Look in table IDs for team abbreviations
-        tables = soup.find_all("table", {"id": lambda x: x and x.endswith('_skaters')})
+        tables = page.skater_tables
         if len(tables) >= 1:
             # First table should be away team
             table_id = tables[0].get('id', '')
@@ -147,13 +343,15 @@ def extract_away_team(soup: BeautifulSoup) -> str:
         print(f"Error extracting away team: {e}")
         return "Unknown Away Team"
 
-def extract_home_score(soup: BeautifulSoup) -> int:
+@timed_stage
+def extract_home_score(page: ParsedPage) -> int:
     """Extract home team final score"""
     try:
+        page = as_parsed_page(page)
+        
         # Look for final score in the scorebox
-        scorebox = soup.find("div", {"class": "scorebox"})
-        if scorebox:
-            score_divs = scorebox.find_all("div", {"class": "score"})
+        if page.scorebox:
+            score_divs = page.score_divs
             if len(score_divs) >= 2:
                 # Second score is usually home team
                 home_score_text = score_divs[1].text.strip()
@@ -163,13 +361,15 @@ def extract_home_score(soup: BeautifulSoup) -> int:
     except Exception:
         return 0
 
-def extract_away_score(soup: BeautifulSoup) -> int:
+@timed_stage
+def extract_away_score(page: ParsedPage) -> int:
     """Extract away team final score"""
     try:
+        page = as_parsed_page(page)
+        
         # Look for final score in the scorebox
-        scorebox = soup.find("div", {"class": "scorebox"})
-        if scorebox:
-            score_divs = scorebox.find_all("div", {"class": "score"})
+        if page.scorebox:
+            score_divs = page.score_divs
             if len(score_divs) >= 1:
                 # First score is usually away team
                 away_score_text = score_divs[0].text.strip()
@@ -179,13 +379,18 @@ def extract_away_score(soup: BeautifulSoup) -> int:
     except Exception:
         return 0
 
-def extract_player_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+def extract_player_stats(page: ParsedPage) -> List[Dict[str, Any]]:
     """Extract individual player statistics using Beautiful Soup"""
+    return [line.to_dict() for line in extract_player_lines(page)]
+
+@timed_stage
+def extract_player_lines(page: ParsedPage) -> List[PlayerLine]:
+    """Extract individual player statistics as PlayerLine records"""
     try:
         player_stats = []
         
-        # Find all skater tables (both teams)  
-        skater_tables = soup.find_all("table", {"id": lambda x: x and x.endswith('_skaters')})
+        # Skater tables for both teams were located when the page was loaded
+        skater_tables = as_parsed_page(page).skater_tables
         
         for table in skater_tables:
             # Extract team name from table ID
@@ -216,6 +421,8 @@ def extract_player_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
                 if header_text and header_text != 'Rk':
                     headers.append(header_text)
             
+            layout = get_skater_layout(headers)
+            
             # Get table body
             tbody = table.find('tbody')
             if not tbody:
@@ -230,49 +437,12 @@ def extract_player_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
                 if len(cells) < 2:
                     continue
                     
-                # Create dictionary mapping headers to values
-                row_data = {}
-                for i, cell in enumerate(cells[1:], 1):  # Skip rank column
-                    if i-1 < len(headers):
-                        row_data[headers[i-1]] = cell.get_text(strip=True)
-                
-                # Skip if no player name
-                if not row_data.get('Player'):
-                    continue
-                    
                 try:
-                    # Map to database fields
-                    player_stat = {
-                        "player_name": str(row_data.get('Player', '')),
-                        "team": team_name,
-                        "position": str(row_data.get('Pos', '')),
-                        "goals": parse_int(row_data.get('G', 0)),
-                        "assists": parse_int(row_data.get('A', 0)),
-                        "points": parse_int(row_data.get('PTS', 0)),
-                        "plus_minus": parse_int(row_data.get('+/-', 0)),
-                        "pim": parse_int(row_data.get('PIM', 0)),
-                        "shots": parse_int(row_data.get('S', 0)),
-                        "hits": parse_int(row_data.get('H', 0)),
-                        "blocks": parse_int(row_data.get('BLK', 0)),
-                        "takeaways": parse_int(row_data.get('TK', 0)),
-                        "giveaways": parse_int(row_data.get('GV', 0)),
-                        "faceoff_wins": parse_int(row_data.get('FO', 0)),
-                        "faceoff_losses": 0,
-                        "toi_seconds": parse_toi_to_seconds(row_data.get('TOI', '0:00'))
-                    }
+                    player_line = decode_skater_row(cells, layout, team_name)
                     
-                    # Calculate faceoff losses if we have faceoff percentage
-                    fo_pct = row_data.get('FO%', '')
-                    if fo_pct and player_stat["faceoff_wins"] > 0:
-                        try:
-                            fo_percentage = float(fo_pct.replace('%', '')) / 100
-                            if fo_percentage > 0:
-                                total_fos = int(player_stat["faceoff_wins"] / fo_percentage)
-                                player_stat["faceoff_losses"] = total_fos - player_stat["faceoff_wins"]
-                        except:
-                            pass
-                    
-                    player_stats.append(player_stat)
+                    # Skip if no player name
+                    if player_line:
+                        player_stats.append(player_line)
                     
                 except Exception as e:
                     print(f"Error processing player row: {e}")
@@ -284,11 +454,88 @@ def extract_player_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
         print(f"Error parsing player stats: {e}")
         return []
 
-def extract_game_outcome(soup: BeautifulSoup, home_team: str, away_team: str, home_goals: int, away_goals: int) -> str:
+# Counting stats read from each skater row, in output order: (field, column header)
+SKATER_INT_COLUMNS = (
+    ("goals", "G"),
+    ("assists", "A"),
+    ("points", "PTS"),
+    ("plus_minus", "+/-"),
+    ("pim", "PIM"),
+    ("shots", "S"),
+    ("hits", "H"),
+    ("blocks", "BLK"),
+    ("takeaways", "TK"),
+    ("giveaways", "GV"),
+    ("faceoff_wins", "FO"),
+)
+SKATER_TEXT_COLUMNS = ("Player", "Pos", "FO%", "TOI")
+
+# Skater table layouts keyed by header signature, shared across pages
+_skater_layouts: Dict[tuple, Dict[str, tuple]] = {}
+
+def get_skater_layout(headers: List[str]) -> Dict[str, tuple]:
+    """
+    Map each skater column to its cell positions for one header signature.
+    
+    Positions include the rank cell and are listed last-first: a repeated
+    header (EV/PP/SH under both Goals and Assists) resolves to its last
+    occurrence that the row actually has a cell for.
+    """
+    signature = tuple(headers)
+    layout = _skater_layouts.get(signature)
+    if layout is None:
+        layout = {}
+        for column in SKATER_TEXT_COLUMNS + tuple(header for _, header in SKATER_INT_COLUMNS):
+            layout[column] = tuple(i + 1 for i in range(len(signature) - 1, -1, -1) if signature[i] == column)
+        _skater_layouts[signature] = layout
+    return layout
+
+def cell_text(cells: list, positions: tuple) -> Optional[str]:
+    """Text of the first listed position the row has a cell for"""
+    for position in positions:
+        if position < len(cells):
+            return cells[position].get_text(strip=True)
+    return None
+
+def decode_skater_row(cells: list, layout: Dict[str, tuple], team_name: str) -> Optional[PlayerLine]:
+    """Decode one skater row by position; None when the row has no player"""
+    player_name = cell_text(cells, layout["Player"])
+    if not player_name:
+        return None
+    
+    # Map to database fields
+    player_line = PlayerLine(
+        player_name=player_name,
+        team=team_name,
+        position=cell_text(cells, layout["Pos"]) or ''
+    )
+    for field, column in SKATER_INT_COLUMNS:
+        text = cell_text(cells, layout[column])
+        if text:
+            setattr(player_line, field, decode_int(text))
+    
+    toi = cell_text(cells, layout["TOI"])
+    if toi:
+        player_line.toi_seconds = decode_toi(toi)
+    
+    # Calculate faceoff losses if we have faceoff percentage
+    fo_pct = cell_text(cells, layout["FO%"])
+    if fo_pct and player_line.faceoff_wins > 0:
+        try:
+            fo_percentage = float(fo_pct.replace('%', '')) / 100
+            if fo_percentage > 0:
+                total_fos = int(player_line.faceoff_wins / fo_percentage)
+                player_line.faceoff_losses = total_fos - player_line.faceoff_wins
+        except:
+            pass
+    
+    return player_line
+
+def extract_game_outcome(page: ParsedPage, home_team: str, away_team: str, home_goals: int, away_goals: int) -> str:
     """Extract game outcome (regulation, OT, SO) from league scores section"""
     try:
-        # Look for the scores section that shows games around the league
-        scores_section = soup.find("div", {"class": "scores"}) or soup.find("div", {"id": "scores"})
+        # The scores section that shows games around the league
+        scores_section = as_parsed_page(page).scores_section
         
         if scores_section:
             # Look for the current game in the scores list
@@ -316,21 +563,26 @@ def extract_game_outcome(soup: BeautifulSoup, home_team: str, away_team: str, ho
         print(f"Error extracting game outcome: {e}")
         return "REG"
 
-def extract_team_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+def extract_team_stats(page: ParsedPage) -> List[Dict[str, Any]]:
     """Extract team-level statistics with proper game outcome"""
+    return [line.to_dict() for line in extract_team_lines(page)]
+
+@timed_stage
+def extract_team_lines(page: ParsedPage) -> List[TeamLine]:
+    """Extract team-level statistics as TeamLine records"""
     try:
-        team_stats = []
+        page = as_parsed_page(page)
         
         # Get team names
-        home_team = extract_home_team(soup)
-        away_team = extract_away_team(soup)
+        home_team = page.home_team
+        away_team = page.away_team
         
         # Get goals from the game
-        home_goals = extract_home_score(soup)
-        away_goals = extract_away_score(soup)
+        home_goals = page.home_score
+        away_goals = page.away_score
         
         # Determine game outcome (REG, OT, SO)
-        game_outcome = extract_game_outcome(soup, home_team, away_team, home_goals, away_goals)
+        game_outcome = extract_game_outcome(page, home_team, away_team, home_goals, away_goals)
         
         # Determine winner
         home_won = home_goals > away_goals
@@ -338,29 +590,29 @@ def extract_team_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
         tie_game = home_goals == away_goals
         
         # Calculate wins/losses based on outcome
-        away_stat = {
-            "team_name": away_team,
-            "is_home": False,
-            "goals": away_goals,
-            "goals_against": home_goals,
-            "wins": 1 if away_won else 0,
-            "losses": 1 if (home_won and game_outcome == "REG") else 0,
-            "ties": 1 if tie_game else 0,
-            "overtime_losses": 1 if (home_won and game_outcome == "OT") else 0,
-            "shootout_losses": 1 if (home_won and game_outcome == "SO") else 0
-        }
+        away_stat = TeamLine(
+            team_name=away_team,
+            is_home=False,
+            goals=away_goals,
+            goals_against=home_goals,
+            wins=1 if away_won else 0,
+            losses=1 if (home_won and game_outcome == "REG") else 0,
+            ties=1 if tie_game else 0,
+            overtime_losses=1 if (home_won and game_outcome == "OT") else 0,
+            shootout_losses=1 if (home_won and game_outcome == "SO") else 0
+        )
         
-        home_stat = {
-            "team_name": home_team,
-            "is_home": True,
-            "goals": home_goals,
-            "goals_against": away_goals,
-            "wins": 1 if home_won else 0,
-            "losses": 1 if (away_won and game_outcome == "REG") else 0,
-            "ties": 1 if tie_game else 0,
-            "overtime_losses": 1 if (away_won and game_outcome == "OT") else 0,
-            "shootout_losses": 1 if (away_won and game_outcome == "SO") else 0
-        }
+        home_stat = TeamLine(
+            team_name=home_team,
+            is_home=True,
+            goals=home_goals,
+            goals_against=away_goals,
+            wins=1 if home_won else 0,
+            losses=1 if (away_won and game_outcome == "REG") else 0,
+            ties=1 if tie_game else 0,
+            overtime_losses=1 if (away_won and game_outcome == "OT") else 0,
+            shootout_losses=1 if (away_won and game_outcome == "SO") else 0
+        )
         
         return [away_stat, home_stat]
     
@@ -368,9 +620,140 @@ def extract_team_stats(soup: BeautifulSoup) -> List[Dict[str, Any]]:
         print(f"Error parsing team stats: {e}")
         return []
 
-def extract_team_record(soup: BeautifulSoup, team_name: str) -> Dict[str, int]:
+def table_columns(table: Tag) -> Dict[str, int]:
+    """Cell index of each column in a stats table, from its Player header row"""
+    thead = table.find('thead')
+    if not thead:
+        return {}
+    for row in thead.find_all('tr'):
+        if row.find('th', string='Player'):
+            columns = {}
+            for i, th in enumerate(row.find_all('th')):
+                # Some headers use a non-breaking hyphen (SAT-F)
+                header = th.get_text(strip=True).replace('\u2011', '-')
+                columns.setdefault(header, i)
+            return columns
+    return {}
+
+def table_rows(table: Tag) -> List[list]:
+    """Cells of each body row, skipping repeated header rows"""
+    tbody = table.find('tbody') or table
+    rows = []
+    for tr in tbody.find_all('tr'):
+        if tr.get('class') and 'thead' in tr.get('class'):
+            continue
+        rows.append(tr.find_all(['td', 'th']))
+    return rows
+
+# Goalie table columns: (field, column header)
+GOALIE_INT_COLUMNS = (
+    ("goals_against", "GA"),
+    ("shots_against", "SA"),
+    ("saves", "SV"),
+    ("shutouts", "SO"),
+    ("pim", "PIM"),
+)
+
+@timed_stage
+def extract_goalie_lines(page: ParsedPage) -> List[GoalieLine]:
+    """Extract goalie statistics from the (usually commented-out) goalie tables"""
+    try:
+        goalie_lines = []
+        
+        for table in as_parsed_page(page).goalie_tables:
+            team_name = table.get('id', '').replace('_goalies', '').upper()
+            columns = table_columns(table)
+            if 'Player' not in columns:
+                continue
+            
+            for cells in table_rows(table):
+                player_cell = columns['Player']
+                if player_cell >= len(cells):
+                    continue
+                player_name = cells[player_cell].get_text(strip=True)
+                if not player_name or player_name == 'Empty Net':
+                    continue
+                
+                goalie_line = GoalieLine(player_name=player_name, team=team_name)
+                decision = cell_text(cells, (columns['DEC'],)) if 'DEC' in columns else None
+                goalie_line.decision = decision or None
+                for field, column in GOALIE_INT_COLUMNS:
+                    text = cell_text(cells, (columns[column],)) if column in columns else None
+                    if text:
+                        setattr(goalie_line, field, decode_int(text))
+                toi = cell_text(cells, (columns['TOI'],)) if 'TOI' in columns else None
+                if toi:
+                    goalie_line.toi_seconds = decode_toi(toi)
+                
+                goalie_lines.append(goalie_line)
+        
+        return goalie_lines
+    
+    except Exception as e:
+        print(f"Error parsing goalie stats: {e}")
+        return []
+
+# Advanced table columns merged into each skater's line: (field, column header)
+ADVANCED_INT_COLUMNS = (
+    ("shot_attempts", "iCF"),
+    ("corsi_for", "SAT-F"),
+    ("corsi_against", "SAT-A"),
+    ("offensive_zone_starts", "ZSO"),
+    ("defensive_zone_starts", "ZSD"),
+)
+
+@timed_stage
+def extract_advanced_stats(page: ParsedPage) -> Dict[tuple, Dict[str, int]]:
+    """
+    Advanced (Corsi) stats keyed by (team, player name). The table repeats
+    each player per game situation; the first row, all situations, is used.
+    """
+    try:
+        advanced = {}
+        
+        for table in as_parsed_page(page).advanced_tables:
+            team_name = table.get('id', '').replace('_adv', '').upper()
+            columns = table_columns(table)
+            if 'Player' not in columns:
+                continue
+            
+            for cells in table_rows(table):
+                player_cell = columns['Player']
+                if player_cell >= len(cells):
+                    continue
+                player_name = cells[player_cell].get_text(strip=True)
+                key = (team_name, player_name)
+                if not player_name or key in advanced:
+                    continue
+                
+                stats = {}
+                for field, column in ADVANCED_INT_COLUMNS:
+                    text = cell_text(cells, (columns[column],)) if column in columns else None
+                    if text:
+                        stats[field] = decode_int(text)
+                advanced[key] = stats
+        
+        return advanced
+    
+    except Exception as e:
+        print(f"Error parsing advanced stats: {e}")
+        return {}
+
+def apply_advanced_stats(page: ParsedPage, player_lines: List[PlayerLine]):
+    """Fill each skater's advanced fields from the page's advanced tables"""
+    advanced = extract_advanced_stats(page)
+    if not advanced:
+        return
+    for player_line in player_lines:
+        stats = advanced.get((player_line.team, player_line.player_name))
+        if stats:
+            for field, value in stats.items():
+                setattr(player_line, field, value)
+
+def extract_team_record(page: ParsedPage, team_name: str) -> Dict[str, int]:
     """Extract team's season record (W-L-T-OTL-SOL) from the page"""
     try:
+        page = as_parsed_page(page)
         record = {
             "wins": 0,
             "losses": 0,
@@ -380,7 +763,7 @@ def extract_team_record(soup: BeautifulSoup, team_name: str) -> Dict[str, int]:
         }
         
         # Look for team record in scorebox or team info sections
-        scorebox = soup.find("div", {"class": "scorebox"})
+        scorebox = page.scorebox
         if scorebox:
             # Look for record patterns like "(25-15-8)" or "(W-L-OTL)"
             record_elements = scorebox.find_all(string=re.compile(r'\(\d+-\d+'))
@@ -406,7 +789,7 @@ def extract_team_record(soup: BeautifulSoup, team_name: str) -> Dict[str, int]:
                     break
         
         # Alternative: look for standings table or team info
-        team_links = soup.find_all("a", href=re.compile(r"/teams/"))
+        team_links = page.soup.find_all("a", href=re.compile(r"/teams/"))
         for link in team_links:
             if team_name.upper() in link.text.upper():
                 # Look for record info near team name
@@ -443,12 +826,14 @@ def extract_team_record(soup: BeautifulSoup, team_name: str) -> Dict[str, int]:
         }
 
 
+NON_INT_CHARS = re.compile(r'[^\d-]')
+
 def parse_int(value) -> int:
     """Safely parse integer values"""
     try:
         if isinstance(value, str):
             # Remove any non-digit characters except minus sign
-            cleaned = re.sub(r'[^\d-]', '', value)
+            cleaned = NON_INT_CHARS.sub('', value)
             return int(cleaned) if cleaned else 0
         return int(value)
     except:
@@ -464,4 +849,54 @@ def parse_toi_to_seconds(toi_str: str) -> int:
             return (minutes * 60) + seconds
         return 0
     except:
-        return 0
\ No newline at end of file
+        return 0
+
+def decode_int(text: str) -> int:
+    """parse_int with a fast path for plain digit cells"""
+    if text.isdecimal():
+        return int(text)
+    return parse_int(text)
+
+def decode_toi(text: str) -> int:
+    """parse_toi_to_seconds with a fast path for plain MM:SS cells"""
+    minutes, sep, seconds = text.partition(':')
+    if sep and minutes.isdecimal() and seconds.isdecimal():
+        return (int(minutes) * 60) + int(seconds)
+    return parse_toi_to_seconds(text)
+
+def check_parser_parity(content, url: str, engines: tuple = (FALLBACK_ENGINE, "lxml")) -> List[str]:
+    """
+    Parse the same page with each engine and list every output field that
+    differs from the first engine's result. An empty list means parity.
+    """
+    results = {}
+    for engine in engines:
+        results[engine] = build_parsed_game(ParsedPage(BeautifulSoup(content, engine), engine), url).to_dict()
+    
+    baseline_engine = engines[0]
+    baseline = results[baseline_engine]
+    mismatches = []
+    for engine in engines[1:]:
+        for key, value in baseline.items():
+            if results[engine][key] != value:
+                mismatches.append(f"{key}: {baseline_engine} != {engine}")
+    
+    return mismatches
+
+if __name__ == "__main__":
+    # Parity check over saved pages:
+    #   python -m services.hockey_parser page1.html page2.html ...
+    import sys
+    
+    failed = 0
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            content = f.read()
+        mismatches = check_parser_parity(content, os.path.basename(path))
+        if mismatches:
+            failed += 1
+            print(f"MISMATCH {path}: {', '.join(mismatches)}")
+        else:
+            print(f"OK {path}")
+    
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,88 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from typing import Deque, Dict
+
+from services.stage_timings import stage
+
+# Games fetched or parsed at once across every ingestion job
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+
+
+class FairScheduler:
+    """
+    Admits ingestion work `workers` items at a time, round-robin across
+    users.
+
+    Jobs no longer run one after another: each game in a bulk add,
+    reprocess or import waits here for a worker slot before it is fetched
+    or parsed. When a slot frees it goes to the next user in turn, so a
+    small import gets every other slot while someone's 800-game
+    reprocess-all is running, instead of queueing behind all of it. A
+    user's own items are admitted in the order they were queued. The
+    fetch engine's per-host rate limit still applies to admitted items.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS):
+        self.workers = max(1, workers)
+        self.active = 0
+        # Waiting items per user; dict order is the round-robin order
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def run(self, user_id: str, fn, *args):
+        """Await fn(*args) once a worker slot is free for this user"""
+        with stage("schedule_wait"):
+            await self.acquire(user_id)
+        try:
+            return await fn(*args)
+        finally:
+            self.release()
+
+    async def acquire(self, user_id: str):
+        if self.active < self.workers and not self.waiting:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(user_id, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+
+    def release(self):
+        """Hand the slot to the next user's oldest waiting item, or free it"""
+        while self.waiting:
+            user_id, queue = self.waiting.popitem(last=False)
+            future = queue.popleft()
+            if queue:
+                # Back of the line until every other waiting user has had a turn
+                self.waiting[user_id] = queue
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, user_id: str, future: asyncio.Future):
+        queue = self.waiting.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self.waiting[user_id]
+
+    def queued(self) -> Dict[str, int]:
+        """Waiting items per user"""
+        return {user_id: len(queue) for user_id, queue in self.waiting.items()}
+
+
+# Global ingestion scheduler instance
+ingest_scheduler = FairScheduler()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from services.stage_timings import current_timings, run_timed, stage
+
+# Worker processes used to parse box scores off the event loop
+# (0 parses in a thread of the API process instead)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+# Documents handed to the pool at once; bounds the raw HTML held in memory
+PARSE_MAX_IN_FLIGHT = int(os.getenv("PARSE_MAX_IN_FLIGHT", str(max(1, PARSE_WORKERS) * 2)))
+
+
+class ParsePool:
+    """
+    Bounded process pool for the CPU-bound parsing stage.
+
+    BeautifulSoup parsing holds the GIL, so running it on the event loop
+    stalls the API and caps ingestion at one core. Jobs hand raw HTML (or an
+    archived URL) to run() and get the ParsedGame back; at most
+    max_in_flight documents are queued or being parsed at any time.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, max_in_flight: int = PARSE_MAX_IN_FLIGHT):
+        self.workers = workers
+        self.slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool shared by every ingestion job, created on first use"""
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool once an in-flight slot is free. When the
+        caller is recording stage timings, the worker's own stages (page
+        load, each extractor) come back with the result.
+        """
+        timings = current_timings.get()
+        if timings is not None:
+            fn, args = run_timed, (fn, *args)
+
+        with stage("parse_wait"):
+            await self.slots.acquire()
+        try:
+            with stage("parse"):
+                executor = self.get_executor()
+                if executor is None:
+                    result = await asyncio.to_thread(fn, *args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(executor, fn, *args)
+        finally:
+            self.slots.release()
+
+        if timings is None:
+            return result
+        result, worker_timings = result
+        timings.merge(worker_timings)
+        return result
+
+    def submit(self, fn, *args) -> asyncio.Task:
+        """Schedule run(fn, *args) now and return the task for its result"""
+        return asyncio.ensure_future(self.run(fn, *args))
+
+
+# Global parse pool instance
+parse_pool = ParsePool()
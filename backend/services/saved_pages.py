@@ -0,0 +1,130 @@
+import gzip
+import os
+import tarfile
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from services.game_urls import BOX_SCORE_BASE_URL, game_key_from_url
+
+# Server-side directory that admin imports may read from
+IMPORT_DIR = os.getenv("BOX_SCORE_IMPORT_DIR", str(Path(__file__).parent.parent / "imports"))
+
+SAVED_PAGE_SUFFIXES = (".html", ".htm", ".html.gz", ".htm.gz")
+
+# Pages an import reads ahead and checks against the user's games (and the
+# registry) per lookup
+SAVED_PAGE_LOOKUP_BATCH = int(os.getenv("SAVED_PAGE_LOOKUP_BATCH", "50"))
+
+
+def is_saved_page(name: str) -> bool:
+    return name.lower().endswith(SAVED_PAGE_SUFFIXES)
+
+
+def saved_page_url(name: str) -> Optional[str]:
+    """
+    Box score URL for a saved page, from its filename the same way
+    extract_date_from_url reads a URL (202306130VEG.html -> .../202306130VEG.html)
+    """
+    filename = os.path.basename(name)
+    if filename.lower().endswith(".gz"):
+        filename = filename[:-3]
+    game_key = game_key_from_url(filename)
+    if not game_key:
+        return None
+    return f"{BOX_SCORE_BASE_URL}{game_key}.html"
+
+
+def _decode(name: str, content: bytes) -> bytes:
+    if name.lower().endswith(".gz"):
+        return gzip.decompress(content)
+    return content
+
+
+def iter_saved_pages(source: str) -> Iterator[Tuple[str, Optional[str], bytes]]:
+    """
+    Stream (filename, url, html) for every saved box score page in a
+    directory tree or tar archive (.tar, .tar.gz, ...), one page in memory
+    at a time. url is None when the filename carries no game key.
+    """
+    path = Path(source)
+    if path.is_dir():
+        for file_path in sorted(path.rglob("*")):
+            if file_path.is_file() and is_saved_page(file_path.name):
+                name = str(file_path.relative_to(path))
+                yield name, saved_page_url(name), _decode(name, file_path.read_bytes())
+        return
+
+    # Streaming mode reads the archive front to back without seeking
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not is_saved_page(member.name):
+                continue
+            f = archive.extractfile(member)
+            if f is None:
+                continue
+            yield member.name, saved_page_url(member.name), _decode(member.name, f.read())
+
+
+def count_saved_pages(source: str) -> int:
+    """Number of pages iter_saved_pages will yield, without reading them"""
+    path = Path(source)
+    if path.is_dir():
+        return sum(1 for file_path in path.rglob("*") if file_path.is_file() and is_saved_page(file_path.name))
+
+    with tarfile.open(path, "r|*") as archive:
+        return sum(1 for member in archive if member.isfile() and is_saved_page(member.name))
+
+
+def resolve_import_source(source: str, root: str = IMPORT_DIR) -> Path:
+    """
+    Resolve an import path against the import directory, refusing anything
+    that points outside it. Raises ValueError for a bad path.
+    """
+    root_path = Path(root).resolve()
+    path = (root_path / source).resolve()
+    if path != root_path and root_path not in path.parents:
+        raise ValueError("Import path must be inside the import directory")
+    if not path.exists():
+        raise ValueError(f"Import path not found: {source}")
+    if not path.is_dir() and not tarfile.is_tarfile(path):
+        raise ValueError("Import path must be a directory or a tar archive")
+    return path
+
+
+if __name__ == "__main__":
+    # Offline import of saved box score pages for one user:
+    #   python -m services.saved_pages <directory or tarball> <user email> [--simple]
+    import asyncio
+    import sys
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 2:
+        print("usage: python -m services.saved_pages <directory or tarball> <user email> [--simple]")
+        sys.exit(2)
+    source, email = args
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if "--simple" in sys.argv:
+        from config.database_simple import supabase_admin as db
+        from services.task_queue_simple import task_queue
+    else:
+        from config.database import supabase_admin as db
+        from services.task_queue import task_queue
+
+    user = db.table("users").select("id").eq("email", email).execute()
+    if not user.data:
+        print(f"No user with email {email}")
+        sys.exit(1)
+
+    task_id = task_queue.create_task(count_saved_pages(source))
+    asyncio.run(task_queue.process_saved_pages(task_id, source, user.data[0]["id"]))
+
+    task = task_queue.get_task(task_id)
+    for error in task.errors:
+        print(error)
+    skipped = sum(1 for result in task.results if result["status"] == "skipped")
+    print(f"Imported {task.completed_items - skipped} of {task.total_items} pages "
+          f"({skipped} already added, {task.failed_items} failed)")
+    sys.exit(1 if task.failed_items else 0)
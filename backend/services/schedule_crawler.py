@@ -0,0 +1,102 @@
+import asyncio
+import re
+from datetime import date
+from typing import Iterable, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from services.box_score_archive import box_score_archive
+from services.box_score_fetcher import is_archived
+from services.fetch_engine import fetch_engine
+from services.game_urls import BOX_SCORE_BASE_URL, game_key_from_url
+
+SCHEDULE_URL = "https://www.hockey-reference.com/teams/{team}/{season}_games.html"
+
+# Only the box score links are built from the schedule page
+BOX_SCORE_LINK_PATTERN = re.compile(r'/boxscores/\d{8}\d[A-Za-z]{3}\.html?$')
+BOX_SCORE_LINKS = SoupStrainer("a", href=BOX_SCORE_LINK_PATTERN)
+
+TEAM_PATTERN = re.compile(r'^[A-Z]{3}$')
+
+
+def season_for_date(day: date) -> int:
+    """hockey-reference season year (the year it ends) that a date falls in"""
+    return day.year + 1 if day.month >= 8 else day.year
+
+
+def schedule_url(team: str, season: int) -> str:
+    return SCHEDULE_URL.format(team=team.upper(), season=season)
+
+
+def game_date_from_key(game_key: str) -> date:
+    return date(int(game_key[:4]), int(game_key[4:6]), int(game_key[6:8]))
+
+
+def extract_box_score_urls(content) -> List[str]:
+    """Canonical box score URLs linked from a schedule page, in page order"""
+    soup = BeautifulSoup(content, "html.parser", parse_only=BOX_SCORE_LINKS)
+    urls = []
+    seen = set()
+    for link in soup.find_all("a", href=True):
+        game_key = game_key_from_url(link["href"])
+        if game_key and game_key not in seen:
+            seen.add(game_key)
+            urls.append(f"{BOX_SCORE_BASE_URL}{game_key}.html")
+    return urls
+
+
+async def fetch_schedule_page(url: str) -> bytes:
+    """
+    Fetch a schedule page through the fetch engine's rate limit. Schedules
+    change during a season, so an archived copy is always revalidated.
+    """
+    result = await fetch_engine.fetch(url, revalidate=True)
+    if result.not_modified:
+        content = await asyncio.to_thread(box_score_archive.get, url)
+        if content is not None:
+            return content
+        result = await fetch_engine.fetch(url)
+    return result.content
+
+
+async def discover_box_score_urls(team: str, season: Optional[int] = None,
+                                  start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                  dates: Optional[Iterable[date]] = None) -> List[str]:
+    """
+    Box score URLs for a team's games, from one schedule page per season.
+
+    Give a season, or a start/end date range (which may span seasons).
+    dates narrows the result to the days the user attended. Games already
+    in the local archive come first so a bulk job reports them right away
+    while the rest wait on the rate limit.
+    """
+    team = team.strip().upper()
+    if not TEAM_PATTERN.match(team):
+        raise ValueError("Team must be a hockey-reference abbreviation like VEG")
+
+    if season:
+        seasons = [season]
+    elif start_date and end_date:
+        if end_date < start_date:
+            raise ValueError("end_date is before start_date")
+        seasons = list(range(season_for_date(start_date), season_for_date(end_date) + 1))
+    else:
+        raise ValueError("Give a season or a start_date and end_date")
+
+    attended = set(dates) if dates else None
+
+    urls = []
+    for season_year in seasons:
+        content = await fetch_schedule_page(schedule_url(team, season_year))
+        for url in extract_box_score_urls(content):
+            game_date = game_date_from_key(game_key_from_url(url))
+            if start_date and game_date < start_date:
+                continue
+            if end_date and game_date > end_date:
+                continue
+            if attended is not None and game_date not in attended:
+                continue
+            urls.append(url)
+
+    archived = await asyncio.to_thread(lambda: {url for url in urls if is_archived(url)})
+    return [url for url in urls if url in archived] + [url for url in urls if url not in archived]
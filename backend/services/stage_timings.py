@@ -0,0 +1,99 @@
+import functools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+# Timings for the URL being processed in the current task (None when
+# nothing is recording, so instrumented code costs one lookup)
+current_timings: ContextVar[Optional["StageTimings"]] = ContextVar("current_timings", default=None)
+
+
+class StageTimings:
+    """
+    Where the time went for one ingested URL: seconds per stage (download,
+    parse, each extractor, database writes) and byte counts. Stages can
+    nest, so times are inclusive, like the parser benchmark's.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.bytes: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def add_bytes(self, name: str, count: int):
+        self.bytes[name] += count
+
+    def merge(self, other: "StageTimings"):
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        for name, count in other.bytes.items():
+            self.bytes[name] += count
+
+    def milliseconds(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 1) for name, seconds in self.seconds.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"timings_ms": self.milliseconds(), "bytes": dict(self.bytes)}
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block against the current URL's timings, if any are recording"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.stage(name):
+        yield
+
+
+def add_bytes(name: str, count: int):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add_bytes(name, count)
+
+
+def timed_stage(fn):
+    """Decorator recording a function's time as a stage named after it"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def recording(timings: StageTimings):
+    """Record stages run in this block (and tasks it starts) into timings"""
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+async def with_timings(fn, *args) -> Tuple[Any, StageTimings]:
+    """
+    Await fn(*args) while recording its stages. Returns (result, timings);
+    an exception is returned as the result so its timings aren't lost.
+    """
+    with recording(StageTimings()) as timings:
+        try:
+            return await fn(*args), timings
+        except Exception as e:
+            return e, timings
+
+
+def run_timed(fn, *args) -> Tuple[Any, StageTimings]:
+    """Run fn(*args) in a parse worker and send its stage timings back with the result"""
+    with recording(StageTimings()) as timings:
+        return fn(*args), timings
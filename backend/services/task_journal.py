@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+TASK_JOURNAL_ENABLED = os.getenv("TASK_JOURNAL", "true").lower() == "true"
+# Keep this on a persistent disk in production; the default lives next to
+# the box score archive
+TASK_JOURNAL_PATH = os.getenv("TASK_JOURNAL_PATH", str(Path(__file__).parent.parent / "archive" / "task_journal.db"))
+# Finished tasks older than this are dropped at startup
+TASK_JOURNAL_RETENTION_DAYS = int(os.getenv("TASK_JOURNAL_RETENTION_DAYS", "14"))
+
+# "inline" runs ingestion tasks in the API process; "worker" only queues
+# them here for `python -m services.worker` processes to run
+INGEST_MODE = os.getenv("INGEST_MODE", "inline").lower()
+# A process's claim on a task lapses if it isn't renewed for this long
+# (the process died), and another process takes the task over
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "60"))
+# How often processes look for queued tasks and for new streamed items
+TASK_POLL_SECONDS = float(os.getenv("TASK_POLL_SECONDS", "1"))
+# Tasks one process runs at once; their games still share the ingestion
+# scheduler's worker slots
+TASK_CLAIM_LIMIT = int(os.getenv("TASK_CLAIM_LIMIT", "8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    kind TEXT,
+    user_id TEXT,
+    params TEXT,
+    status TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    items_open INTEGER NOT NULL DEFAULT 0,
+    items_error TEXT
+);
+CREATE TABLE IF NOT EXISTS task_items (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS task_entries (
+    task_id TEXT NOT NULL,
+    list TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (task_id, list, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+"""
+
+# Columns added to the tasks table since it was first created
+ADDED_COLUMNS = {
+    "claimed_by": "TEXT",
+    "claimed_at": "REAL",
+    "items_open": "INTEGER NOT NULL DEFAULT 0",
+    "items_error": "TEXT",
+}
+
+UNFINISHED_STATUSES = ("pending", "processing")
+
+
+class TaskJournal:
+    """
+    Durable record of ingestion tasks in a local SQLite database (WAL mode).
+
+    Each task has a row with its counters and status, the work items it was
+    started with (URLs, or game rows to reprocess) and its per-item results
+    and errors, which are append-only so saving progress writes only the
+    new entries. After a restart the task queue resumes unfinished tasks
+    from the items that have no result yet, and finished tasks can still be
+    looked up.
+
+    It is also the queue shared by every process on the host: the API
+    processes and any `python -m services.worker` processes. A process
+    claims a task before running it and renews the claim while it works;
+    a claim that lapses means the process died, and another one takes the
+    task over.
+    """
+
+    def __init__(self, path: str, enabled: bool = TASK_JOURNAL_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Durable across process crashes; only an OS crash can lose the
+            # last few commits, which resume simply redoes
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(tasks)")}
+            for column, definition in ADDED_COLUMNS.items():
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE tasks ADD COLUMN {column} {definition}")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def save(self, task_id: str, status: str, state: Dict[str, Any],
+             new_entries: Dict[str, List[tuple]]):
+        """
+        Write a task's current state. new_entries maps "results"/"errors"
+        to (seq, entry) pairs not yet written.
+        """
+        if not self.enabled:
+            return
+        with self._lock, self.connection as db:
+            db.execute(
+                "INSERT INTO tasks (task_id, status, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET status = excluded.status, state = excluded.state, "
+                "updated_at = excluded.updated_at",
+                (task_id, status, json.dumps(state), datetime.now().isoformat())
+            )
+            for list_name, entries in new_entries.items():
+                db.executemany(
+                    "INSERT OR REPLACE INTO task_entries (task_id, list, seq, entry) VALUES (?, ?, ?, ?)",
+                    [(task_id, list_name, seq, json.dumps(entry)) for seq, entry in entries]
+                )
+
+    def begin(self, task_id: str, kind: str, user_id: str, params: Dict[str, Any], items: List[Any],
+              claimed_by: Optional[str] = None, items_open: Optional[bool] = None) -> bool:
+        """
+        Record what a task is working on, which makes it ready to run. A
+        resumed task keeps its original items. With claimed_by the task is
+        claimed for that process unless another one holds it; returns
+        whether claimed_by holds it.
+        """
+        if not self.enabled:
+            return True
+        with self._lock, self.connection as db:
+            db.execute(
+                "UPDATE tasks SET kind = ?, user_id = ?, params = ?, items_open = COALESCE(?, items_open), "
+                "claimed_by = COALESCE(claimed_by, ?), claimed_at = COALESCE(claimed_at, ?) WHERE task_id = ?",
+                (kind, user_id, json.dumps(params), items_open, claimed_by,
+                 time.time() if claimed_by else None, task_id)
+            )
+            has_items = db.execute("SELECT 1 FROM task_items WHERE task_id = ? LIMIT 1", (task_id,)).fetchone()
+            if not has_items:
+                db.executemany(
+                    "INSERT INTO task_items (task_id, seq, item) VALUES (?, ?, ?)",
+                    [(task_id, seq, json.dumps(item)) for seq, item in enumerate(items)]
+                )
+            owner = db.execute("SELECT claimed_by FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return owner is not None and owner[0] == claimed_by
+
+    def add_items(self, task_id: str, items: List[Any]):
+        """Append items to a task that is still receiving them (a streamed upload)"""
+        if not self.enabled or not items:
+            return
+        with self._lock, self.connection as db:
+            (start,) = db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM task_items WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            db.executemany(
+                "INSERT INTO task_items (task_id, seq, item) VALUES (?, ?, ?)",
+                [(task_id, seq, json.dumps(item)) for seq, item in enumerate(items, start)]
+            )
+
+    def close_items(self, task_id: str, error: Optional[str] = None):
+        """Mark a streamed upload finished, with the error that cut it short if any"""
+        if not self.enabled:
+            return
+        with self._lock, self.connection as db:
+            db.execute("UPDATE tasks SET items_open = 0, items_error = ? WHERE task_id = ?", (error, task_id))
+
+    def read_items(self, task_id: str, start: int) -> Tuple[List[Any], bool, Optional[str]]:
+        """Items from position start on, whether more may follow, and the upload's error"""
+        with self._lock:
+            db = self.connection
+            # Read the flag first: items are always added before it is cleared
+            items_open, items_error = db.execute(
+                "SELECT items_open, items_error FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            items = [json.loads(item) for (item,) in db.execute(
+                "SELECT item FROM task_items WHERE task_id = ? AND seq >= ? ORDER BY seq", (task_id, start)
+            )]
+        return items, bool(items_open), items_error
+
+    def claim(self, worker_id: str, limit: int, lease_seconds: float = TASK_LEASE_SECONDS) -> List[Dict[str, Any]]:
+        """
+        Claim up to limit tasks no live process holds: tasks queued for a
+        worker, and tasks whose process stopped renewing its claim
+        """
+        if not self.enabled or limit <= 0:
+            return []
+        now = time.time()
+        with self._lock, self.connection as db:
+            db.execute(
+                "UPDATE tasks SET claimed_by = ?, claimed_at = ? WHERE task_id IN ("
+                f"SELECT task_id FROM tasks WHERE status IN ({','.join('?' * len(UNFINISHED_STATUSES))}) "
+                "AND kind IS NOT NULL AND (claimed_by IS NULL OR claimed_at < ?) ORDER BY rowid LIMIT ?)",
+                (worker_id, now, *UNFINISHED_STATUSES, now - lease_seconds, limit)
+            )
+            task_ids = [task_id for (task_id,) in db.execute(
+                "SELECT task_id FROM tasks WHERE claimed_by = ? AND claimed_at = ?", (worker_id, now)
+            )]
+        return [self.load(task_id) for task_id in task_ids]
+
+    def heartbeat(self, worker_id: str, task_ids: List[str]) -> Set[str]:
+        """Renew worker_id's claims on task_ids; returns the ones it still holds"""
+        if not self.enabled:
+            return set(task_ids)
+        placeholders = ",".join("?" * len(task_ids))
+        with self._lock, self.connection as db:
+            db.execute(
+                f"UPDATE tasks SET claimed_at = ? WHERE claimed_by = ? AND task_id IN ({placeholders})",
+                (time.time(), worker_id, *task_ids)
+            )
+            return {task_id for (task_id,) in db.execute(
+                f"SELECT task_id FROM tasks WHERE claimed_by = ? AND task_id IN ({placeholders})",
+                (worker_id, *task_ids)
+            )}
+
+    def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """A task's row, items, results and errors, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            db = self.connection
+            row = db.execute(
+                "SELECT task_id, kind, user_id, params, status, state, items_open, items_error "
+                "FROM tasks WHERE task_id = ?",
+                (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            items = [json.loads(item) for (item,) in db.execute(
+                "SELECT item FROM task_items WHERE task_id = ? ORDER BY seq", (task_id,)
+            )]
+            entries = {"results": [], "errors": []}
+            for list_name, entry in db.execute(
+                "SELECT list, entry FROM task_entries WHERE task_id = ? ORDER BY list, seq", (task_id,)
+            ):
+                entries.setdefault(list_name, []).append(json.loads(entry))
+
+        task_id, kind, user_id, params, status, state, items_open, items_error = row
+        return {
+            "task_id": task_id,
+            "kind": kind,
+            "user_id": user_id,
+            "params": json.loads(params) if params else {},
+            "status": status,
+            "state": json.loads(state),
+            "items": items,
+            "items_open": bool(items_open),
+            "items_error": items_error,
+            **entries,
+        }
+
+    def prune(self, days: int = TASK_JOURNAL_RETENTION_DAYS):
+        """Drop finished tasks not updated in the last `days` days"""
+        if not self.enabled:
+            return
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        with self._lock, self.connection as db:
+            stale = f"SELECT task_id FROM tasks WHERE updated_at < ? AND status NOT IN ({','.join('?' * len(UNFINISHED_STATUSES))})"
+            params = (cutoff, *UNFINISHED_STATUSES)
+            db.execute(f"DELETE FROM task_items WHERE task_id IN ({stale})", params)
+            db.execute(f"DELETE FROM task_entries WHERE task_id IN ({stale})", params)
+            db.execute(f"DELETE FROM tasks WHERE task_id IN ({stale})", params)
+
+
+# Global task journal instance
+task_journal = TaskJournal(TASK_JOURNAL_PATH)
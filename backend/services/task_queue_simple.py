@@ -1,11 +1,26 @@
 import asyncio
+import os
 import uuid
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple, Union, AsyncIterable
 from datetime import datetime
 import time
 from enum import Enum
-from dataclasses import dataclass, asdict
-from services.hockey_parser_simple import parse_hockey_reference_url
+from dataclasses import dataclass, asdict, field
+from services.hockey_parser_simple import parse_archived_box_score, parse_box_score, PARSER_VERSION
+from services.box_score_fetcher import is_archived
+from services.box_score_archive import box_score_archive, ARCHIVE_ENABLED
+from services.saved_pages import iter_saved_pages, SAVED_PAGE_LOOKUP_BATCH
+from services.fetch_engine import fetch_engine
+from services.parse_pool import parse_pool, PARSE_MAX_IN_FLIGHT
+from services.game_loader import game_loader
+from services.game_registry_simple import game_registry
+from services.game_urls import game_key_from_url
+from services.stage_timings import StageTimings, recording, with_timings
+from services.ingest_scheduler import ingest_scheduler
+from services.write_buffer import STORE_BATCH_GAMES
+from services.task_journal import (
+    task_journal, INGEST_MODE, TASK_CLAIM_LIMIT, TASK_LEASE_SECONDS, TASK_POLL_SECONDS
+)
 from config.database_simple import supabase
 
 
@@ -28,14 +43,34 @@ class TaskResult:
     errors: List[str]
     created_at: datetime
     updated_at: datetime
+    # True while items are still being added (a streamed upload)
+    accepting_items: bool = False
+    # Per-stage time and byte counts summed over every processed item
+    stage_totals_ms: Dict[str, float] = field(default_factory=dict)
+    byte_totals: Dict[str, int] = field(default_factory=dict)
+    # User who started the task; only they can see its status
+    user_id: Optional[str] = None
 
 
 class InMemoryTaskQueue:
     def __init__(self):
         self.tasks: Dict[str, TaskResult] = {}
-        self.processing_lock = asyncio.Lock()
+        # Jobs started alongside the request that feeds them
+        self.jobs = set()
+        # Results and errors already written to the journal, per task
+        self.journaled: Dict[str, Tuple[int, int]] = {}
+        # False when a worker process runs the tasks and this one (the API)
+        # only queues them and reads their status from the journal
+        self.runs_jobs = INGEST_MODE != "worker"
+        # Identifies this process's claims on journaled tasks
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Tasks this process has claimed, and the asyncio task running each
+        self.running: Dict[str, asyncio.Task] = {}
+        self.heartbeat: Optional[asyncio.Task] = None
+        # Feeds of the streamed uploads this process is running
+        self.feeds: Dict[str, asyncio.Queue] = {}
     
-    def create_task(self, total_items: int) -> str:
+    def create_task(self, total_items: int, user_id: Optional[str] = None) -> str:
         task_id = str(uuid.uuid4())
         task_result = TaskResult(
             task_id=task_id,
@@ -47,13 +82,22 @@ class InMemoryTaskQueue:
             results=[],
             errors=[],
             created_at=datetime.now(),
-            updated_at=datetime.now()
+            updated_at=datetime.now(),
+            user_id=user_id
         )
-        self.tasks[task_id] = task_result
+        if self.runs_jobs:
+            self.tasks[task_id] = task_result
+        self.journal(task_result)
         return task_id
     
     def get_task(self, task_id: str) -> Optional[TaskResult]:
-        return self.tasks.get(task_id)
+        task = self.tasks.get(task_id)
+        if task is None:
+            # Run by another process, or finished before the last restart
+            record = task_journal.load(task_id)
+            if record:
+                task = self.task_from_record(record)
+        return task
     
     def update_task(self, task_id: str, **kwargs):
         if task_id in self.tasks:
@@ -68,173 +112,681 @@ class InMemoryTaskQueue:
                 task.progress = int(((task.completed_items + task.failed_items) / task.total_items) * 100)
             
             # Update status based on progress
-            if task.progress >= 100:
+            if task.progress >= 100 and not task.accepting_items:
                 task.status = TaskStatus.COMPLETED
+            if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                self.running.pop(task_id, None)
+            
+            self.journal(task)
+    
+    def submit(self, background_tasks, task_id: str, kind: str, user_id: str, items: List[Any], **params):
+        """
+        Run a task after the response, or with INGEST_MODE=worker leave it
+        in the journal for a worker process to claim
+        """
+        if self.runs_jobs:
+            background_tasks.add_task(self.run_job, task_id, kind, user_id, items, params)
+        else:
+            task_journal.begin(task_id, kind, user_id, params, items)
+    
+    def open_stream(self, task_id: str, user_id: str):
+        """Start a bulk task whose URLs arrive through add_items until close_items"""
+        if not self.runs_jobs:
+            task_journal.begin(task_id, "bulk", user_id, {}, [], items_open=True)
+            return
+        task_journal.begin(task_id, "bulk", user_id, {}, [], claimed_by=self.worker_id, items_open=True)
+        self.update_task(task_id, accepting_items=True)
+        feed = self.feeds[task_id] = asyncio.Queue()
+        self.start(self.process_bulk_stream(task_id, feed, user_id))
+    
+    async def add_items(self, task_id: str, items: List[Any]):
+        """
+        Grow a task's total as a streamed upload yields another batch of
+        items, journaling the batch in one write off the event loop
+        """
+        await asyncio.to_thread(task_journal.add_items, task_id, items)
+        feed = self.feeds.get(task_id)
+        if feed:
+            task = self.get_task(task_id)
+            self.update_task(task_id, total_items=task.total_items + len(items))
+            for item in items:
+                feed.put_nowait(item)
+    
+    def close_items(self, task_id: str, error: Optional[str] = None):
+        """End a streamed upload, noting the error that cut it short if any"""
+        feed = self.feeds.pop(task_id, None)
+        if feed is None:
+            # A worker process picks this up from the journal
+            task_journal.close_items(task_id, error)
+            return
+        task_journal.close_items(task_id)
+        task = self.get_task(task_id)
+        if error:
+            task.errors.append(error)
+        self.update_task(task_id, errors=task.errors, accepting_items=False)
+        feed.put_nowait(None)
+    
+    def journal(self, task: TaskResult):
+        """Write a task's state and its new results and errors to the journal"""
+        results_saved, errors_saved = self.journaled.get(task.task_id, (0, 0))
+        state = {
+            "progress": task.progress,
+            "total_items": task.total_items,
+            "completed_items": task.completed_items,
+            "failed_items": task.failed_items,
+            "accepting_items": task.accepting_items,
+            "stage_totals_ms": task.stage_totals_ms,
+            "byte_totals": task.byte_totals,
+            "user_id": task.user_id,
+            "created_at": task.created_at.isoformat(),
+            "updated_at": task.updated_at.isoformat(),
+        }
+        task_journal.save(task.task_id, task.status.value, state, {
+            "results": list(enumerate(task.results[results_saved:], results_saved)),
+            "errors": list(enumerate(task.errors[errors_saved:], errors_saved)),
+        })
+        self.journaled[task.task_id] = (len(task.results), len(task.errors))
+    
+    @staticmethod
+    def task_from_record(record: Dict[str, Any]) -> TaskResult:
+        state = record["state"]
+        return TaskResult(
+            task_id=record["task_id"],
+            status=TaskStatus(record["status"]),
+            progress=state["progress"],
+            total_items=state["total_items"],
+            completed_items=state["completed_items"],
+            failed_items=state["failed_items"],
+            results=record["results"],
+            errors=record["errors"],
+            created_at=datetime.fromisoformat(state["created_at"]),
+            updated_at=datetime.fromisoformat(state["updated_at"]),
+            accepting_items=state["accepting_items"],
+            stage_totals_ms=state["stage_totals_ms"],
+            byte_totals=state["byte_totals"],
+            user_id=state.get("user_id")
+        )
+    
+    def begin(self, task_id: str, kind: str, user_id: str, params: Dict[str, Any], items: List[Any]) -> bool:
+        """
+        Journal what a task works on and claim it for this process. Returns
+        False if another process already has it.
+        """
+        if not task_journal.begin(task_id, kind, user_id, params, items, claimed_by=self.worker_id):
+            print(f"Task {task_id} is being run by another process")
+            return False
+        self.running[task_id] = asyncio.current_task()
+        if self.heartbeat is None or self.heartbeat.done():
+            self.heartbeat = asyncio.ensure_future(self.keep_claims())
+        return True
+    
+    async def keep_claims(self):
+        """Renew this process's claims while it runs tasks, stopping any another process took over"""
+        while self.running:
+            await asyncio.sleep(TASK_LEASE_SECONDS / 4)
+            for task_id, job in list(self.running.items()):
+                if job.done():
+                    del self.running[task_id]
+            if not self.running:
+                break
+            held = task_journal.heartbeat(self.worker_id, list(self.running))
+            for task_id in set(self.running) - held:
+                print(f"Task {task_id} was taken over by another process; stopping it here")
+                self.running.pop(task_id).cancel()
+    
+    async def serve(self):
+        """
+        Claim and run journaled tasks no live process holds: tasks queued for
+        a worker and tasks cut off by a restart or crash. Runs until cancelled.
+        """
+        task_journal.prune()
+        while True:
+            for record in task_journal.claim(self.worker_id, TASK_CLAIM_LIMIT - len(self.running)):
+                self.resume(record)
+            await asyncio.sleep(TASK_POLL_SECONDS)
+    
+    def resume(self, record: Dict[str, Any]):
+        """Start a claimed task from the items that have no result yet"""
+        task = self.task_from_record(record)
+        self.tasks[task.task_id] = task
+        self.journaled[task.task_id] = (len(task.results), len(task.errors))
+        kind, items = record["kind"], record["items"]
+        done_key = {"bulk": "url", "reprocess": "game_id", "import": "file"}.get(kind)
+        done = {result.get(done_key) for result in task.results}
+        
+        if kind == "bulk":
+            task.total_items = len(items)
+            task.accepting_items = record["items_open"]
+        
+        print(f"Running {kind} task {task.task_id} ({len(task.results)} of {task.total_items} items already done)")
+        self.start(self.run_job(
+            task.task_id, kind, record["user_id"], items, record["params"], done, record["items_open"]
+        ))
+    
+    async def run_job(self, task_id: str, kind: str, user_id: str, items: List[Any], params: Dict[str, Any],
+                      done: Set[Any] = frozenset(), follow: bool = False):
+        """Run a task's items that have no result in done; with follow, also the ones still being uploaded"""
+        if kind == "bulk":
+            urls = [url for url in items if url not in done]
+            await self.process_bulk_games(task_id, self.follow_items(task_id, urls, len(items)) if follow else urls, user_id)
+        elif kind == "reprocess":
+            await self.process_reprocess_games(
+                task_id, [tuple(game) for game in items if game[0] not in done], user_id, params.get("refresh", False)
+            )
+        elif kind == "import":
+            await self.process_saved_pages(task_id, params["source"], user_id, skip=done)
+        else:
+            task = self.get_task(task_id)
+            task.errors.append("Interrupted by a restart before processing started")
+            self.update_task(task_id, status=TaskStatus.FAILED, errors=task.errors)
+    
+    async def follow_items(self, task_id: str, urls: List[str], start: int):
+        """
+        URLs of a streamed upload being read by another process: urls, then
+        the ones it adds to the journal from position start on, until it
+        closes the upload or goes quiet for a lease period (it died)
+        """
+        for url in urls:
+            yield url
+        
+        last_item = time.monotonic()
+        while True:
+            items, items_open, items_error = await asyncio.to_thread(task_journal.read_items, task_id, start)
+            if items:
+                start += len(items)
+                last_item = time.monotonic()
+                task = self.get_task(task_id)
+                self.update_task(task_id, total_items=task.total_items + len(items))
+                for url in items:
+                    yield url
+            elif not items_open:
+                break
+            elif time.monotonic() - last_item > TASK_LEASE_SECONDS:
+                items_error = "Upload stopped arriving"
+                break
+            else:
+                await asyncio.sleep(TASK_POLL_SECONDS)
+        
+        task = self.get_task(task_id)
+        if items_error:
+            task.errors.append(items_error)
+        self.update_task(task_id, errors=task.errors, accepting_items=False)
+    
+    def record_timings(self, task_id: str, timings: StageTimings) -> Dict[str, Any]:
+        """Add one item's stage timings to its task's totals; returns them for the item's result"""
+        task = self.get_task(task_id)
+        if task:
+            for name, ms in timings.milliseconds().items():
+                task.stage_totals_ms[name] = round(task.stage_totals_ms.get(name, 0.0) + ms, 1)
+            for name, count in timings.bytes.items():
+                task.byte_totals[name] = task.byte_totals.get(name, 0) + count
+        return timings.to_dict()
     
-    async def process_bulk_games(self, task_id: str, urls: List[str], user_id: str):
+    def start(self, job) -> asyncio.Task:
+        """Run a job now instead of after the response, keeping a reference until it ends"""
+        job = asyncio.ensure_future(job)
+        self.jobs.add(job)
+        job.add_done_callback(self.jobs.discard)
+        return job
+    
+    async def process_bulk_stream(self, task_id: str, feed: asyncio.Queue, user_id: str):
+        """
+        Process URLs as they are put on feed, while the upload is still
+        being read. None on the feed marks the end of the upload.
+        """
+        async def feed_urls():
+            while True:
+                url = await feed.get()
+                if url is None:
+                    break
+                yield url
+        
+        await self.process_bulk_games(task_id, feed_urls(), user_id)
+    
+    async def process_bulk_games(self, task_id: str, urls: Union[List[str], AsyncIterable[str]], user_id: str):
         """Process multiple game URLs with rate limiting"""
-        async with self.processing_lock:
-            self.update_task(task_id, status=TaskStatus.PROCESSING)
-            
-            for i, url in enumerate(urls):
-                try:
-                    # Add delay between requests to be respectful to Hockey Reference
-                    if i > 0:
-                        await asyncio.sleep(2)  # 2 second delay between requests
-                    
-                    # Parse the game
-                    parsed_data = parse_hockey_reference_url(url.strip())
-                    
-                    # Use extracted date from URL if available, otherwise use current date
-                    game_date = parsed_data.get("game_date")
-                    if game_date:
-                        date_attended = game_date
-                    else:
-                        date_attended = datetime.now().isoformat()
-                    
-                    # Create game record
-                    game_record = {
-                        "user_id": user_id,
-                        "hockey_reference_url": url.strip(),
-                        "date_attended": date_attended,
-                        "home_team": parsed_data["home_team"],
-                        "away_team": parsed_data["away_team"],
-                        "final_score_home": parsed_data["final_score_home"],
-                        "final_score_away": parsed_data["final_score_away"],
-                        "created_at": datetime.now().isoformat()
-                    }
-                    
-                    # Insert game
-                    result = supabase.table("games").insert(game_record)
+        if isinstance(urls, list):
+            urls = [url.strip() for url in urls]
+        # A streamed upload journals its URLs as they arrive
+        if not self.begin(task_id, "bulk", user_id, {}, urls if isinstance(urls, list) else []):
+            return
+        self.update_task(task_id, status=TaskStatus.PROCESSING)
+        
+        # Each game is stored once for all users: games already in the
+        # registry cost a lookup, the rest are downloaded and parsed ahead
+        # of the loop. Downloads are paced by the fetch engine's per-host
+        # rate limit (archived games don't hit the network) and parsing
+        # runs in the process pool. Enough games run ahead to fill a batch
+        # of registry writes; the ingestion scheduler still admits only a
+        # few fetches and parses at a time
+        loads = fetch_engine.run_in_order(
+            urls,
+            lambda url: with_timings(game_registry.ensure, url, user_id),
+            window=STORE_BATCH_GAMES
+        )
+        
+        async for url, (canonical, timings) in loads:
+            try:
+                if isinstance(canonical, Exception):
+                    raise canonical
+                
+                # Use the game's date if available, otherwise use current date
+                game_date = canonical.get("game_date")
+                if game_date:
+                    date_attended = game_date
+                else:
+                    date_attended = datetime.now().isoformat()
+                
+                # Record the user's attendance of the shared game
+                game_record = {
+                    "user_id": user_id,
+                    "hockey_reference_url": url.strip(),
+                    "game_key": canonical["game_key"],
+                    "date_attended": date_attended,
+                    **game_registry.game_fields(canonical),
+                    "created_at": datetime.now().isoformat()
+                }
+                
+                # Insert game
+                with timings.stage("db_games_insert"):
+                    result = await asyncio.to_thread(lambda: supabase.table("games").insert(game_record))
+                
+                if result.data:
+                    game_id = result.data[0]["id"]
                     
-                    if result.data:
-                        game_id = result.data[0]["id"]
-                        
-                        # Store player stats
-                        for player_stat in parsed_data["player_stats"]:
-                            player_stat["game_id"] = game_id
-                            supabase.table("player_stats").insert(player_stat)
-                        
-                        # Store team stats
-                        for team_stat in parsed_data["team_stats"]:
-                            team_stat["game_id"] = game_id
-                            supabase.table("team_stats").insert(team_stat)
-                        
-                        # Update task with success
-                        task = self.get_task(task_id)
-                        task.results.append({
-                            "url": url.strip(),
-                            "game_id": game_id,
-                            "matchup": f"{parsed_data['away_team']} @ {parsed_data['home_team']}",
-                            "status": "success"
-                        })
-                        task.completed_items += 1
-                        self.update_task(task_id, results=task.results, completed_items=task.completed_items)
-                        
-                    else:
-                        raise Exception("Failed to create game record")
-                        
-                except Exception as e:
-                    # Update task with error
+                    # Update task with success
                     task = self.get_task(task_id)
-                    error_msg = f"Failed to process {url.strip()}: {str(e)}"
-                    task.errors.append(error_msg)
-                    task.failed_items += 1
                     task.results.append({
                         "url": url.strip(),
-                        "status": "failed",
-                        "error": str(e)
+                        "game_id": game_id,
+                        "matchup": game_registry.matchup(canonical),
+                        "status": "success",
+                        **self.record_timings(task_id, timings)
                     })
-                    self.update_task(task_id, 
-                                   errors=task.errors, 
-                                   failed_items=task.failed_items,
-                                   results=task.results)
-                    print(f"Error processing game: {error_msg}")
-            
-            # Mark task as completed
-            self.update_task(task_id, status=TaskStatus.COMPLETED)
-
-    async def process_reprocess_games(self, task_id: str, game_data: List[tuple], user_id: str):
-        """Reprocess existing games with rate limiting"""
-        async with self.processing_lock:
-            self.update_task(task_id, status=TaskStatus.PROCESSING)
-            
-            for i, (game_id, url) in enumerate(game_data):
-                try:
-                    # Add delay between requests to be respectful to Hockey Reference
-                    if i > 0:
-                        await asyncio.sleep(2)  # 2 second delay between requests
+                    task.completed_items += 1
+                    self.update_task(task_id, results=task.results, completed_items=task.completed_items)
                     
-                    # Parse the game with updated logic
-                    parsed_data = parse_hockey_reference_url(url.strip())
+                else:
+                    raise Exception("Failed to create game record")
                     
-                    # Use extracted date from URL if available, otherwise use existing date
-                    game_date = parsed_data.get("game_date")
-                    if game_date:
-                        date_attended = game_date
+            except Exception as e:
+                # Update task with error
+                task = self.get_task(task_id)
+                error_msg = f"Failed to process {url.strip()}: {str(e)}"
+                task.errors.append(error_msg)
+                task.failed_items += 1
+                task.results.append({
+                    "url": url.strip(),
+                    "status": "failed",
+                    "error": str(e),
+                    **self.record_timings(task_id, timings)
+                })
+                self.update_task(task_id, 
+                               errors=task.errors, 
+                               failed_items=task.failed_items,
+                               results=task.results)
+                print(f"Error processing game: {error_msg}")
+        
+        # Mark task as completed
+        self.update_task(task_id, status=TaskStatus.COMPLETED)
+
+    async def process_reprocess_games(self, task_id: str, game_data: List[tuple], user_id: str, refresh: bool = False):
+        """
+        Reprocess existing games, re-deriving archived ones offline.
+        
+        game_data holds (game_id, url, parser_version) tuples. Each canonical
+        game is re-derived at most once, and not at all when the registry
+        already has it from the current parser. With refresh, archived pages
+        are revalidated against hockey-reference first and games whose page
+        and parser version are both unchanged are skipped.
+        """
+        if not self.begin(task_id, "reprocess", user_id, {"refresh": refresh}, [list(game) for game in game_data]):
+            return
+        self.update_task(task_id, status=TaskStatus.PROCESSING)
+        
+        registered = await asyncio.to_thread(game_registry.get_many, [
+            game_key for game_key in (game_key_from_url(url.strip()) for _, url, _ in game_data) if game_key
+        ])
+        
+        # The first row pointing at each canonical game that needs
+        # re-deriving; every other row just picks up the result
+        to_parse = {}
+        for game_id, url, _ in game_data:
+            game_key = game_key_from_url(url.strip())
+            if not game_key or game_key in to_parse:
+                continue
+            if refresh or not game_registry.is_current(registered.get(game_key)):
+                to_parse[game_key] = game_id
+        parse_ids = set(to_parse.values())
+        
+        # Games with a stored copy are queued for parsing straight away (the
+        # ingestion scheduler admits them a few at a time, taking turns with
+        # other users' jobs); only the rest need the network. Each game is
+        # stored as soon as it is parsed, so games finishing together share
+        # the registry's batched writes
+        offline_parses = {} if refresh else {
+            game_id: asyncio.ensure_future(with_timings(
+                game_registry.derive, game_key_from_url(url.strip()),
+                ingest_scheduler.run, user_id, parse_pool.run, parse_archived_box_score, url.strip()
+            ))
+            for game_id, url, _ in game_data
+            if game_id in parse_ids and is_archived(url.strip())
+        }
+        
+        # The rest are downloaded and parsed ahead of the loop, paced by the
+        # fetch engine's per-host rate limit
+        network_loads = fetch_engine.run_in_order(
+            [url.strip() for game_id, url, _ in game_data if game_id in parse_ids and game_id not in offline_parses],
+            lambda url: with_timings(
+                game_registry.derive, game_key_from_url(url),
+                ingest_scheduler.run, user_id, game_loader.load, url, parse_box_score, refresh
+            )
+        )
+        
+        for game_id, url, parser_version in game_data:
+            timings = StageTimings()
+            try:
+                game_key = game_key_from_url(url.strip())
+                if not game_key:
+                    raise Exception("Not a hockey-reference box score URL")
+                
+                parsed_game = None
+                if game_id in offline_parses:
+                    stored, timings = await offline_parses.pop(game_id)
+                    if isinstance(stored, Exception):
+                        raise stored
+                    if stored is not None:
+                        registered[game_key] = stored
                     else:
-                        # Keep existing date
-                        existing_game = supabase.table("games").select("date_attended").eq("id", game_id)
-                        date_attended = existing_game.data[0]["date_attended"] if existing_game.data else datetime.now().isoformat()
+                        # The archived copy went away after the job started
+                        with recording(timings):
+                            parsed_game = await game_loader.load(url.strip(), parse_box_score)
+                elif game_id in parse_ids:
+                    _, (stored, timings) = await anext(network_loads)
+                    if isinstance(stored, Exception):
+                        raise stored
                     
-                    # Update game record
-                    game_record = {
-                        "hockey_reference_url": url.strip(),
-                        "date_attended": date_attended,
-                        "home_team": parsed_data["home_team"],
-                        "away_team": parsed_data["away_team"],
-                        "final_score_home": parsed_data["final_score_home"],
-                        "final_score_away": parsed_data["final_score_away"]
-                    }
-                    
-                    # Update the game
-                    supabase.table("games").update(game_record).eq("id", game_id)
-                    
-                    # Delete existing stats for this game
-                    supabase.table("player_stats").delete().eq("game_id", game_id)
-                    supabase.table("team_stats").delete().eq("game_id", game_id)
-                    
-                    # Store updated player stats
-                    for player_stat in parsed_data["player_stats"]:
-                        player_stat["game_id"] = game_id
-                        supabase.table("player_stats").insert(player_stat)
-                    
-                    # Store updated team stats
-                    for team_stat in parsed_data["team_stats"]:
-                        team_stat["game_id"] = game_id
-                        supabase.table("team_stats").insert(team_stat)
-                    
-                    # Update task with success
+                    if stored is not None:
+                        registered[game_key] = stored
+                    else:
+                        # Revalidation found the archived page unchanged
+                        if not game_registry.is_current(registered.get(game_key)):
+                            with recording(timings):
+                                parsed_game = await parse_pool.run(parse_archived_box_score, url.strip())
+                        elif (parser_version or 0) >= PARSER_VERSION:
+                            # Same page, same parser: nothing to re-derive
+                            task = self.get_task(task_id)
+                            task.results.append({
+                                "game_id": game_id,
+                                "url": url.strip(),
+                                "status": "unchanged",
+                                **self.record_timings(task_id, timings)
+                            })
+                            task.completed_items += 1
+                            self.update_task(task_id, results=task.results, completed_items=task.completed_items)
+                            continue
+                
+                if parsed_game is not None:
+                    with recording(timings):
+                        registered[game_key] = await game_registry.store(game_key, parsed_game)
+                # Otherwise the registry already has the game from the current parser
+                
+                canonical = registered.get(game_key)
+                if canonical is None:
+                    raise Exception("Game could not be re-derived")
+                
+                # Use the game's date if available, otherwise use existing date
+                game_date = canonical.get("game_date")
+                if game_date:
+                    date_attended = game_date
+                else:
+                    # Keep existing date
+                    existing_game = await asyncio.to_thread(lambda: supabase.table("games").select("date_attended").eq("id", game_id))
+                    date_attended = existing_game.data[0]["date_attended"] if existing_game.data else datetime.now().isoformat()
+                
+                # Update game record
+                game_record = {
+                    "hockey_reference_url": url.strip(),
+                    "game_key": game_key,
+                    "date_attended": date_attended,
+                    **game_registry.game_fields(canonical)
+                }
+                
+                # Update the game
+                with timings.stage("db_games_update"):
+                    await asyncio.to_thread(lambda: supabase.table("games").update(game_record).eq("id", game_id))
+                
+                # Update task with success
+                task = self.get_task(task_id)
+                task.results.append({
+                    "game_id": game_id,
+                    "url": url.strip(),
+                    "matchup": game_registry.matchup(canonical),
+                    "status": "success",
+                    **self.record_timings(task_id, timings)
+                })
+                task.completed_items += 1
+                self.update_task(task_id, results=task.results, completed_items=task.completed_items)
+                
+            except Exception as e:
+                # Update task with error
+                task = self.get_task(task_id)
+                error_msg = f"Failed to reprocess game {game_id}: {str(e)}"
+                task.errors.append(error_msg)
+                task.failed_items += 1
+                task.results.append({
+                    "game_id": game_id,
+                    "url": url.strip(),
+                    "status": "failed",
+                    "error": str(e),
+                    **self.record_timings(task_id, timings)
+                })
+                self.update_task(task_id, 
+                               errors=task.errors, 
+                               failed_items=task.failed_items,
+                               results=task.results)
+                print(f"Error reprocessing game: {error_msg}")
+        
+        # Mark task as completed
+        self.update_task(task_id, status=TaskStatus.COMPLETED)
+
+    async def process_saved_pages(self, task_id: str, source: str, user_id: str, skip: Optional[Set[str]] = None):
+        """
+        Import saved box score pages from a directory or tar archive.
+        
+        Nothing touches the network: each page's game key and date come from
+        its filename, and pages for games not yet in the registry are parsed
+        in the process pool while the next ones are read. Imported pages are
+        added to the box score archive so later reprocessing stays offline
+        too. Files named in skip (already imported by this task before a
+        restart) are passed over, and pages for games the user already has
+        are counted as skipped. Games rows are inserted in batches.
+        """
+        if not self.begin(task_id, "import", user_id, {"source": source}, []):
+            return
+        self.update_task(task_id, status=TaskStatus.PROCESSING)
+        
+        pages = iter_saved_pages(source)
+        pending = []
+        # Pages read from the source whose games have been looked up but
+        # not yet queued
+        unread = []
+        # Games the user has, or that an earlier page of this import added
+        owned = set()
+        registered = {}
+        already_added = object()
+        
+        async def read_chunk():
+            # Read the next pages and look all their games up at once
+            while len(unread) < SAVED_PAGE_LOOKUP_BATCH:
+                try:
+                    page = await asyncio.to_thread(next, pages, None)
+                except Exception as e:
+                    # A corrupt archive ends the stream; report it as a failed item
+                    unread.append((source, None, e))
+                    break
+                if page is None:
+                    break
+                if skip and page[0] in skip:
+                    continue
+                unread.append(page)
+            game_keys = {game_key_from_url(url) for _, url, _ in unread if url} - owned
+            if game_keys:
+                owned.update(await asyncio.to_thread(game_registry.user_game_keys, user_id, game_keys))
+                registered.update(await asyncio.to_thread(game_registry.get_many, game_keys))
+        
+        async def read_ahead():
+            # Keep the parse pool busy without holding the whole source in memory
+            while len(pending) < PARSE_MAX_IN_FLIGHT:
+                if not unread:
+                    await read_chunk()
+                    if not unread:
+                        return
+                name, url, content = unread.pop(0)
+                if isinstance(content, Exception):
+                    pending.append((name, url, content))
+                    continue
+                if url is None:
+                    pending.append((name, url, None))
+                    continue
+                game_key = game_key_from_url(url)
+                if game_key in owned:
+                    pending.append((name, url, already_added))
+                    continue
+                owned.add(game_key)
+                if ARCHIVE_ENABLED and not box_score_archive.has(url):
+                    try:
+                        await asyncio.to_thread(box_score_archive.put, url, content)
+                    except Exception as e:
+                        print(f"Error archiving {name}: {e}")
+                canonical = registered.pop(game_key, None)
+                if game_registry.is_current(canonical):
+                    # Another user already has this game; no parse needed
+                    pending.append((name, url, canonical))
+                    continue
+                # Stored as soon as it is parsed, batched with other pages
+                pending.append((name, url, asyncio.ensure_future(with_timings(
+                    game_registry.derive, game_key,
+                    ingest_scheduler.run, user_id, parse_pool.run, parse_box_score, content, url
+                ))))
+        
+        # Imported games waiting to be inserted together:
+        # (name, url, canonical, game_record, timings)
+        to_insert = []
+        
+        def import_failed(name, url, error, timings):
+            task = self.get_task(task_id)
+            error_msg = f"Failed to import {name}: {str(error)}"
+            task.errors.append(error_msg)
+            task.failed_items += 1
+            task.results.append({
+                "file": name,
+                "url": url,
+                "status": "failed",
+                "error": str(error),
+                **self.record_timings(task_id, timings)
+            })
+            self.update_task(task_id, 
+                           errors=task.errors, 
+                           failed_items=task.failed_items,
+                           results=task.results)
+            print(f"Error importing saved page: {error_msg}")
+        
+        async def insert_games():
+            batch = to_insert[:]
+            to_insert.clear()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(
+                    lambda: supabase.table("games").insert([game_record for _, _, _, game_record, _ in batch])
+                )
+                if not result.data or len(result.data) != len(batch):
+                    raise Exception("Failed to create game records")
+                rows = result.data
+            except Exception as e:
+                if len(batch) == 1:
+                    rows = [e]
+                else:
+                    # Find the rows at fault so only their pages fail
+                    print(f"Inserting {len(batch)} imported games failed ({str(e)}); inserting them one at a time")
+                    rows = []
+                    for _, _, _, game_record, _ in batch:
+                        try:
+                            result = await asyncio.to_thread(lambda: supabase.table("games").insert(game_record))
+                            rows.append(result.data[0] if result.data else Exception("Failed to create game record"))
+                        except Exception as row_error:
+                            rows.append(row_error)
+            # The batch's insert time, shared between its pages
+            insert_seconds = (time.perf_counter() - started) / len(batch)
+            
+            for (name, url, canonical, _, timings), row in zip(batch, rows):
+                timings.seconds["db_games_insert"] += insert_seconds
+                if isinstance(row, Exception):
+                    import_failed(name, url, row, timings)
+                    continue
+                # Update task with success
+                task = self.get_task(task_id)
+                task.results.append({
+                    "file": name,
+                    "url": url,
+                    "game_id": row["id"],
+                    "matchup": game_registry.matchup(canonical),
+                    "status": "success",
+                    **self.record_timings(task_id, timings)
+                })
+                task.completed_items += 1
+                self.update_task(task_id, results=task.results, completed_items=task.completed_items)
+        
+        await read_ahead()
+        
+        while pending:
+            name, url, job = pending.pop(0)
+            timings = StageTimings()
+            try:
+                if isinstance(job, Exception):
+                    raise job
+                if job is None:
+                    raise Exception("No hockey-reference game key in filename")
+                if job is already_added:
+                    await read_ahead()
                     task = self.get_task(task_id)
                     task.results.append({
-                        "game_id": game_id,
-                        "url": url.strip(),
-                        "matchup": f"{parsed_data['away_team']} @ {parsed_data['home_team']}",
-                        "status": "success"
+                        "file": name,
+                        "url": url,
+                        "status": "skipped",
+                        **self.record_timings(task_id, timings)
                     })
                     task.completed_items += 1
                     self.update_task(task_id, results=task.results, completed_items=task.completed_items)
-                    
-                except Exception as e:
-                    # Update task with error
-                    task = self.get_task(task_id)
-                    error_msg = f"Failed to reprocess game {game_id}: {str(e)}"
-                    task.errors.append(error_msg)
-                    task.failed_items += 1
-                    task.results.append({
-                        "game_id": game_id,
-                        "url": url.strip(),
-                        "status": "failed",
-                        "error": str(e)
-                    })
-                    self.update_task(task_id, 
-                                   errors=task.errors, 
-                                   failed_items=task.failed_items,
-                                   results=task.results)
-                    print(f"Error reprocessing game: {error_msg}")
-            
-            # Mark task as completed
-            self.update_task(task_id, status=TaskStatus.COMPLETED)
+                    continue
+                if isinstance(job, dict):
+                    canonical = job
+                else:
+                    canonical, timings = await job
+                    if isinstance(canonical, Exception):
+                        raise canonical
+                await read_ahead()
+                
+                to_insert.append((name, url, canonical, {
+                    "user_id": user_id,
+                    "hockey_reference_url": url,
+                    "game_key": canonical["game_key"],
+                    "date_attended": canonical.get("game_date") or datetime.now().isoformat(),
+                    **game_registry.game_fields(canonical),
+                    "created_at": datetime.now().isoformat()
+                }, timings))
+                if len(to_insert) >= STORE_BATCH_GAMES:
+                    await insert_games()
+                
+            except Exception as e:
+                await read_ahead()
+                import_failed(name, url, e, timings)
+        
+        if to_insert:
+            await insert_games()
+        
+        # Mark task as completed
+        self.update_task(task_id, status=TaskStatus.COMPLETED)
 
 
 # Global task queue instance
@@ -0,0 +1,123 @@
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from services.game_urls import game_key_from_url
+
+BOX_SCORE_URL_PATTERN = re.compile(r'https?://(?:[\w-]+\.)*hockey-reference\.com[^\s"\'<>,]*')
+# Punctuation from the surrounding text, not part of the URL
+TRAILING_PUNCTUATION = ".;:!?)]}"
+
+# No line holding a single URL gets near this; longer lines are skipped
+# rather than buffered
+MAX_LINE_BYTES = 8192
+
+# URLs checked against the user's games per lookup while an upload streams
+# in; small enough that processing starts almost as soon as it begins
+UPLOAD_LOOKUP_BATCH = 50
+
+
+def extract_url(line: str) -> Optional[str]:
+    """
+    Hockey Reference URL on one line of an upload. NDJSON lines may be
+    {"url": ...} objects or bare JSON strings; anything else is treated as
+    text, like the pasted list /games/bulk takes.
+    """
+    line = line.strip()
+    if line.startswith(("{", '"')):
+        try:
+            value = json.loads(line)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            value = value.get("url") or value.get("hockey_reference_url")
+        if isinstance(value, str):
+            line = value
+
+    url_match = BOX_SCORE_URL_PATTERN.search(line)
+    return url_match.group().rstrip(TRAILING_PUNCTUATION) if url_match else None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines, holding at most one line in memory"""
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line.decode("utf-8", errors="replace")
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer = b""
+            skipping = True
+    if buffer and not skipping:
+        yield buffer.decode("utf-8", errors="replace")
+
+
+async def iter_multipart_data(request: Request, boundary: bytes) -> AsyncIterator[bytes]:
+    """Contents of every part of a multipart/form-data body, as it arrives"""
+    data = []
+    parser = MultipartParser(boundary, {
+        "on_part_data": lambda buf, start, end: data.append(buf[start:end]),
+        # Keep the last line of one part from running into the next
+        "on_part_end": lambda: data.append(b"\n"),
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for part_data in data:
+            yield part_data
+        data.clear()
+    parser.finalize()
+    for part_data in data:
+        yield part_data
+
+
+async def iter_upload_urls(request: Request, counts: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+    """
+    Unique Hockey Reference URLs from a streamed upload, in upload order.
+
+    Accepts a multipart/form-data file upload, NDJSON or plain text with
+    one URL per line. The body is read incrementally and never held in
+    memory whole; only the keys of games already seen are kept, so the
+    same game given under two URL spellings is queued once. Repeats are
+    counted in counts["duplicates"] when counts is given.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type == b"multipart/form-data":
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise ValueError("Multipart upload has no boundary")
+        chunks = iter_multipart_data(request, boundary)
+    else:
+        chunks = request.stream()
+
+    seen = set()
+    async for line in iter_lines(chunks):
+        url = extract_url(line)
+        if not url:
+            continue
+        key = game_key_from_url(url) or url
+        if key in seen:
+            if counts is not None:
+                counts["duplicates"] = counts.get("duplicates", 0) + 1
+            continue
+        seen.add(key)
+        yield url
+
+
+async def batched(urls: AsyncIterator[str], size: int) -> AsyncIterator[List[str]]:
+    """Group a URL stream into lists of up to size, flushing the rest at the end"""
+    batch = []
+    async for url in urls:
+        batch.append(url)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,38 @@
+# Ingestion worker: runs the bulk adds, reprocessing and imports queued in
+# the task journal, outside the API process.
+#
+#   python -m services.worker [--simple]
+#
+# Set INGEST_MODE=worker for the API so it only queues tasks and reads
+# their status, then run as many workers as ingestion needs, on the same
+# host and with the same TASK_JOURNAL_PATH. A task whose worker died is
+# taken over by another one (or by the same one after a restart) once its
+# claim lapses.
+import asyncio
+import sys
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if "--simple" in sys.argv:
+        from services.task_queue_simple import task_queue
+    else:
+        from services.task_queue import task_queue
+    from services.task_journal import task_journal
+
+    if not task_journal.enabled:
+        print("The worker takes tasks from the task journal; set TASK_JOURNAL=true")
+        sys.exit(2)
+
+    task_queue.runs_jobs = True
+    print(f"Ingestion worker {task_queue.worker_id} taking tasks from {task_journal.path}")
+    try:
+        asyncio.run(task_queue.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
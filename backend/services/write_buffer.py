@@ -0,0 +1,93 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+# Games written to the database per batch, at most
+STORE_BATCH_GAMES = int(os.getenv("STORE_BATCH_GAMES", "50"))
+# How long a batch waits for more games before it is written
+STORE_FLUSH_SECONDS = float(os.getenv("STORE_FLUSH_SECONDS", "0.5"))
+
+
+class WriteBuffer:
+    """
+    Gathers writes from concurrent callers into batches.
+
+    Each caller submits one item and waits for its own result. The first
+    item waits up to `linger` seconds for company (or until `max_items`
+    have arrived), then the batch goes to `write` in one call; items
+    submitted while a batch is being written make up the next one. A
+    caller with nothing to batch with can pass a shorter linger for its
+    item (0 to write it straight away, with whatever is already waiting). If a
+    batch fails its items are retried one at a time, so the error reaches
+    only the callers whose items caused it.
+
+    `write` takes a list of items and returns their results in the same
+    order.
+    """
+
+    def __init__(self, write: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_items: int = STORE_BATCH_GAMES, linger: float = STORE_FLUSH_SECONDS):
+        self.write = write
+        self.max_items = max(1, max_items)
+        self.linger = linger
+        # (item, its caller's future, loop time it must be written by)
+        self.buffer: List[Tuple[Any, asyncio.Future, float]] = []
+        # Resolved to end the flusher's lingering early: the buffer filled,
+        # or an item arrived that can't wait until waiting_until
+        self.wake: Optional[asyncio.Future] = None
+        self.waiting_until = 0.0
+        self.flusher: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any, linger: Optional[float] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        due = loop.time() + (self.linger if linger is None else linger)
+        future = loop.create_future()
+        self.buffer.append((item, future, due))
+        if self.wake and not self.wake.done() and (len(self.buffer) >= self.max_items or due < self.waiting_until):
+            self.wake.set_result(None)
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.ensure_future(self.flush_all())
+        return await future
+
+    async def flush_all(self):
+        loop = asyncio.get_running_loop()
+        while self.buffer:
+            while len(self.buffer) < self.max_items:
+                self.waiting_until = min(due for _, _, due in self.buffer)
+                if self.waiting_until <= loop.time():
+                    break
+                self.wake = loop.create_future()
+                await asyncio.wait([self.wake], timeout=self.waiting_until - loop.time())
+                self.wake = None
+            batch, self.buffer = self.buffer[:self.max_items], self.buffer[self.max_items:]
+            # Callers that gave up (a cancelled task) don't need writing
+            batch = [(item, future) for item, future, _ in batch if not future.done()]
+            if batch:
+                await self.flush(batch)
+
+    async def flush(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.write([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self.settle(batch[0][1], error=e)
+                return
+            print(f"Batch write of {len(batch)} items failed ({str(e)}); writing them one at a time")
+            for item, future in batch:
+                try:
+                    self.settle(future, (await self.write([item]))[0])
+                except Exception as item_error:
+                    self.settle(future, error=item_error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            self.settle(future, result)
+
+    @staticmethod
+    def settle(future: asyncio.Future, result: Any = None, error: Optional[Exception] = None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -0,0 +1,7 @@
+-- Migration: Record which parser version produced each game's stats
+-- Lets reprocess-all re-derive only games parsed by an older parser
+
+ALTER TABLE games ADD COLUMN IF NOT EXISTS parser_version INTEGER;
+
+-- Reprocess-all looks up a user's games by parser version
+CREATE INDEX IF NOT EXISTS idx_games_user_parser_version ON games(user_id, parser_version);
@@ -0,0 +1,26 @@
+-- Migration: Goalie lines and advanced (Corsi) skater stats
+-- Both come from tables hockey-reference hides in HTML comments
+
+-- Advanced stats per skater; NULL for games without an advanced table
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS shot_attempts SMALLINT;
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS corsi_for SMALLINT;
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS corsi_against SMALLINT;
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS offensive_zone_starts SMALLINT;
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS defensive_zone_starts SMALLINT;
+
+-- Goalie lines: a few rows per game, keyed by game so no surrogate id
+CREATE TABLE IF NOT EXISTS goalie_stats (
+    game_id UUID NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    player_name VARCHAR(255) NOT NULL,
+    team VARCHAR(10) NOT NULL,
+    decision CHAR(1),
+    goals_against SMALLINT DEFAULT 0,
+    shots_against SMALLINT DEFAULT 0,
+    saves SMALLINT DEFAULT 0,
+    shutouts SMALLINT DEFAULT 0,
+    pim SMALLINT DEFAULT 0,
+    toi_seconds INTEGER DEFAULT 0,
+    PRIMARY KEY (game_id, team, player_name)
+);
+
+ALTER TABLE goalie_stats DISABLE ROW LEVEL SECURITY;
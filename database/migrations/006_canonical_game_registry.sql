@@ -0,0 +1,145 @@
+-- Migration: Shared canonical games
+-- Each box score is stored and parsed once; users' games rows record
+-- attendance and point at the canonical game through game_key
+
+-- One row per hockey-reference box score, e.g. 202306130VEG
+CREATE TABLE IF NOT EXISTS canonical_games (
+    game_key VARCHAR(12) PRIMARY KEY,
+    hockey_reference_url TEXT NOT NULL,
+    game_date DATE,
+    home_team VARCHAR(255),
+    away_team VARCHAR(255),
+    final_score_home INTEGER,
+    final_score_away INTEGER,
+    parser_version INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE canonical_games DISABLE ROW LEVEL SECURITY;
+
+-- Link each user's game to its canonical game
+ALTER TABLE games ADD COLUMN IF NOT EXISTS game_key VARCHAR(12);
+
+UPDATE games
+SET game_key = UPPER(substring(hockey_reference_url from '(\d{9}[A-Za-z]{3})\.html?'))
+WHERE game_key IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_games_game_key ON games(game_key);
+
+-- The newest parse of each game becomes its canonical copy
+CREATE TEMP TABLE representative_games AS
+SELECT DISTINCT ON (game_key) id, game_key
+FROM games
+WHERE game_key IS NOT NULL
+ORDER BY game_key, parser_version DESC NULLS LAST, created_at DESC;
+
+INSERT INTO canonical_games (game_key, hockey_reference_url, game_date, home_team, away_team,
+                             final_score_home, final_score_away, parser_version)
+SELECT g.game_key,
+       'https://www.hockey-reference.com/boxscores/' || g.game_key || '.html',
+       to_date(left(g.game_key, 8), 'YYYYMMDD'),
+       g.home_team, g.away_team, g.final_score_home, g.final_score_away, g.parser_version
+FROM games g
+INNER JOIN representative_games r ON r.id = g.id
+ON CONFLICT (game_key) DO NOTHING;
+
+-- The views join stats through game_id, which is about to go
+DROP VIEW IF EXISTS player_stats_aggregated;
+DROP VIEW IF EXISTS team_stats_aggregated;
+
+-- Key stats by canonical game, keeping only the representative copy
+ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS game_key VARCHAR(12) REFERENCES canonical_games(game_key) ON DELETE CASCADE;
+ALTER TABLE team_stats ADD COLUMN IF NOT EXISTS game_key VARCHAR(12) REFERENCES canonical_games(game_key) ON DELETE CASCADE;
+ALTER TABLE goalie_stats ADD COLUMN IF NOT EXISTS game_key VARCHAR(12) REFERENCES canonical_games(game_key) ON DELETE CASCADE;
+
+UPDATE player_stats ps SET game_key = r.game_key FROM representative_games r WHERE ps.game_id = r.id;
+UPDATE team_stats ts SET game_key = r.game_key FROM representative_games r WHERE ts.game_id = r.id;
+UPDATE goalie_stats gs SET game_key = r.game_key FROM representative_games r WHERE gs.game_id = r.id;
+
+-- Stats of games whose URL has no game key can't be re-keyed. Set them
+-- aside with their game_id for manual fixing instead of dropping them
+CREATE TABLE IF NOT EXISTS unkeyed_player_stats AS
+SELECT * FROM player_stats
+WHERE game_key IS NULL AND game_id IN (SELECT id FROM games WHERE game_key IS NULL);
+CREATE TABLE IF NOT EXISTS unkeyed_team_stats AS
+SELECT * FROM team_stats
+WHERE game_key IS NULL AND game_id IN (SELECT id FROM games WHERE game_key IS NULL);
+CREATE TABLE IF NOT EXISTS unkeyed_goalie_stats AS
+SELECT * FROM goalie_stats
+WHERE game_key IS NULL AND game_id IN (SELECT id FROM games WHERE game_key IS NULL);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM games WHERE game_key IS NULL) THEN
+        RAISE NOTICE '% games have no game key; their stats were moved to the unkeyed_*_stats tables',
+            (SELECT COUNT(*) FROM games WHERE game_key IS NULL);
+    END IF;
+END $$;
+
+-- What's left without a key is the duplicate copies of games that already
+-- have a representative copy
+DELETE FROM player_stats WHERE game_key IS NULL;
+DELETE FROM team_stats WHERE game_key IS NULL;
+DELETE FROM goalie_stats WHERE game_key IS NULL;
+
+ALTER TABLE player_stats ALTER COLUMN game_key SET NOT NULL;
+ALTER TABLE team_stats ALTER COLUMN game_key SET NOT NULL;
+ALTER TABLE goalie_stats ALTER COLUMN game_key SET NOT NULL;
+
+ALTER TABLE goalie_stats DROP CONSTRAINT IF EXISTS goalie_stats_pkey;
+ALTER TABLE player_stats DROP COLUMN IF EXISTS game_id;
+ALTER TABLE team_stats DROP COLUMN IF EXISTS game_id;
+ALTER TABLE goalie_stats DROP COLUMN IF EXISTS game_id;
+ALTER TABLE goalie_stats ADD PRIMARY KEY (game_key, team, player_name);
+
+CREATE INDEX IF NOT EXISTS idx_player_stats_game_key ON player_stats(game_key);
+CREATE INDEX IF NOT EXISTS idx_team_stats_game_key ON team_stats(game_key);
+
+DROP TABLE representative_games;
+
+-- Recreate the aggregated views over the shared stats: a game counts once
+-- for every user who attended it
+CREATE OR REPLACE VIEW player_stats_aggregated AS
+SELECT
+    ps.player_name,
+    ps.team,
+    ps.position,
+    g.user_id,
+    SUM(ps.goals) as goals,
+    SUM(ps.assists) as assists,
+    SUM(ps.points) as points,
+    SUM(ps.plus_minus) as plus_minus,
+    SUM(ps.pim) as pim,
+    SUM(ps.shots) as shots,
+    SUM(ps.hits) as hits,
+    SUM(ps.blocks) as blocks,
+    SUM(ps.takeaways) as takeaways,
+    SUM(ps.giveaways) as giveaways,
+    SUM(ps.faceoff_wins) as faceoff_wins,
+    SUM(ps.faceoff_losses) as faceoff_losses,
+    SUM(ps.toi_seconds) as toi_seconds,
+    COUNT(*) as games_played
+FROM player_stats ps
+INNER JOIN games g ON ps.game_key = g.game_key
+GROUP BY ps.player_name, ps.team, ps.position, g.user_id
+ORDER BY SUM(ps.points) DESC, SUM(ps.goals) DESC, SUM(ps.assists) DESC;
+
+CREATE OR REPLACE VIEW team_stats_aggregated AS
+SELECT
+    ts.team_name,
+    g.user_id,
+    SUM(ts.goals) as goals,
+    SUM(ts.goals_against) as goals_against,
+    SUM(ts.wins) as wins,
+    SUM(ts.losses) as losses,
+    SUM(ts.ties) as ties,
+    SUM(ts.overtime_losses) as overtime_losses,
+    SUM(ts.shootout_losses) as shootout_losses,
+    COUNT(*) as games_played
+FROM team_stats ts
+INNER JOIN games g ON ts.game_key = g.game_key
+GROUP BY ts.team_name, g.user_id
+ORDER BY (SUM(ts.wins) * 2 + SUM(ts.overtime_losses) + SUM(ts.shootout_losses)) DESC;
+
+GRANT SELECT ON player_stats_aggregated TO PUBLIC;
+GRANT SELECT ON team_stats_aggregated TO PUBLIC;
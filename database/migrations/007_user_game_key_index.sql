@@ -0,0 +1,5 @@
+-- Migration: Index users' games by game key
+-- Bulk submissions check a whole batch of game keys against the user's
+-- games in one query before queueing anything
+
+CREATE INDEX IF NOT EXISTS idx_games_user_game_key ON games(user_id, game_key);
@@ -0,0 +1,67 @@
+-- Migration: Transactional game writes
+-- Stores parsed games (canonical row plus player, team and goalie stats)
+-- in one call and one transaction, so a failed write never leaves a game
+-- with only some of its stats
+
+-- games: [{"canonical": {...}, "player_stats": [...], "team_stats": [...],
+--          "goalie_stats": [...]}, ...]
+-- Each game's existing stats are replaced. Returns the canonical rows.
+CREATE OR REPLACE FUNCTION ingest_games(games JSONB)
+RETURNS SETOF canonical_games
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    game_keys VARCHAR(12)[];
+BEGIN
+    SELECT array_agg(game->'canonical'->>'game_key')
+    INTO game_keys
+    FROM jsonb_array_elements(games) AS game;
+
+    INSERT INTO canonical_games (game_key, hockey_reference_url, game_date, home_team, away_team,
+                                 final_score_home, final_score_away, parser_version, updated_at)
+    SELECT c.game_key, c.hockey_reference_url, c.game_date, c.home_team, c.away_team,
+           c.final_score_home, c.final_score_away, c.parser_version, COALESCE(c.updated_at, NOW())
+    FROM jsonb_array_elements(games) AS game,
+         jsonb_populate_record(NULL::canonical_games, game->'canonical') AS c
+    ON CONFLICT (game_key) DO UPDATE SET
+        hockey_reference_url = EXCLUDED.hockey_reference_url,
+        game_date = EXCLUDED.game_date,
+        home_team = EXCLUDED.home_team,
+        away_team = EXCLUDED.away_team,
+        final_score_home = EXCLUDED.final_score_home,
+        final_score_away = EXCLUDED.final_score_away,
+        parser_version = EXCLUDED.parser_version,
+        updated_at = EXCLUDED.updated_at;
+
+    DELETE FROM player_stats WHERE game_key = ANY(game_keys);
+    DELETE FROM team_stats WHERE game_key = ANY(game_keys);
+    DELETE FROM goalie_stats WHERE game_key = ANY(game_keys);
+
+    INSERT INTO player_stats (game_key, player_name, team, position, goals, assists, points, plus_minus,
+                              pim, shots, hits, blocks, takeaways, giveaways, faceoff_wins,
+                              faceoff_losses, toi_seconds, shot_attempts, corsi_for, corsi_against,
+                              offensive_zone_starts, defensive_zone_starts)
+    SELECT p.game_key, p.player_name, p.team, p.position, p.goals, p.assists, p.points, p.plus_minus,
+           p.pim, p.shots, p.hits, p.blocks, p.takeaways, p.giveaways, p.faceoff_wins,
+           p.faceoff_losses, p.toi_seconds, p.shot_attempts, p.corsi_for, p.corsi_against,
+           p.offensive_zone_starts, p.defensive_zone_starts
+    FROM jsonb_array_elements(games) AS game,
+         jsonb_populate_recordset(NULL::player_stats, game->'player_stats') AS p;
+
+    INSERT INTO team_stats (game_key, team_name, is_home, goals, goals_against, wins, losses, ties,
+                            overtime_losses, shootout_losses)
+    SELECT t.game_key, t.team_name, t.is_home, t.goals, t.goals_against, t.wins, t.losses, t.ties,
+           t.overtime_losses, t.shootout_losses
+    FROM jsonb_array_elements(games) AS game,
+         jsonb_populate_recordset(NULL::team_stats, game->'team_stats') AS t;
+
+    INSERT INTO goalie_stats (game_key, player_name, team, decision, goals_against, shots_against,
+                              saves, shutouts, pim, toi_seconds)
+    SELECT g.game_key, g.player_name, g.team, g.decision, g.goals_against, g.shots_against,
+           g.saves, g.shutouts, g.pim, g.toi_seconds
+    FROM jsonb_array_elements(games) AS game,
+         jsonb_populate_recordset(NULL::goalie_stats, game->'goalie_stats') AS g;
+
+    RETURN QUERY SELECT * FROM canonical_games WHERE game_key = ANY(game_keys);
+END;
+$$;
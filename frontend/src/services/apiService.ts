@@ -39,7 +39,7 @@ export const apiService = {
     await api.delete(`/games/${gameId}`);
   },
 
-  async createBulkGames(urlsText: string): Promise<{ task_id: string; total_urls: number; message: string }> {
+  async createBulkGames(urlsText: string): Promise<{ task_id: string; total_urls: number; skipped: number; message: string }> {
     const response = await api.post('/games/bulk', { urls_text: urlsText });
     return response.data;
   },